@@ -0,0 +1,245 @@
+"""Admission control for tool calls: concurrency limits, bounded queues and per-session rate limits.
+
+Every tool call takes a slot from its tool's limit (``MCP_TOOL_CONCURRENCY``)
+and a slot from the global limit (``MCP_MAX_CONCURRENCY``). When no slot is
+free, the call waits in a bounded queue (``MCP_QUEUE_SIZE``) for up to
+``MCP_QUEUE_TIMEOUT`` seconds. A call that finds the queue full, or whose wait
+times out, is rejected immediately with :class:`Overloaded`. The client gets
+that as a tool error instead of a slow reply.
+
+Calls made on an SSE session (or a stateful streamable-HTTP session) are also
+rate limited per session with a token bucket (``MCP_SESSION_RATE`` calls/s,
+bursts of ``MCP_SESSION_BURST``), so one noisy agent cannot starve the others.
+Limits are per worker process.
+"""
+import asyncio
+import contextlib
+import functools
+import os
+import time
+from typing import Any, AsyncIterator, Callable
+
+from mcp.server.lowlevel.server import request_ctx
+
+from cache import TTLCache
+
+# Tools that fan out to slow upstreams get a tighter limit than the default
+DEFAULT_TOOL_LIMITS = {
+    "get_azure_price": 4,
+    "gdpr_semantic_search": 8,
+    "China_pipl_semantic_search": 8,
+}
+
+
+class Overloaded(Exception):
+    """Raised instead of running a tool call the server has no capacity for."""
+
+    def __init__(self, message: str, reason: str, retry_after: float | None = None):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def parse_limits(value: str) -> dict[str, int]:
+    """``"get_azure_price=4,gdpr_semantic_search=8"`` -> ``{"get_azure_price": 4, ...}``."""
+    limits = {}
+    for item in value.split(","):
+        if item.strip():
+            name, _, limit = item.partition("=")
+            limits[name.strip()] = int(limit)
+    return limits
+
+
+class ConcurrencyLimit:
+    """Semaphore with a bounded, time-limited wait queue."""
+
+    def __init__(self, name: str, limit: int, queue_size: int, timeout: float | None):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "timeout": 0}
+
+    def _reject(self, reason: str) -> Overloaded:
+        self.rejected[reason] += 1
+        if reason == "queue_full":
+            detail = f"all {self.limit} slots are busy and {self.queued} calls are already waiting"
+        else:
+            detail = f"no slot of {self.limit} freed up within {self.timeout:g}s"
+        return Overloaded(f"Server busy: {self.name} is at capacity ({detail}). Retry later.", reason)
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if self._semaphore.locked():
+            if self.queued >= self.queue_size:
+                raise self._reject("queue_full")
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                raise self._reject("timeout") from None
+            finally:
+                self.queued -= 1
+        else:
+            await self._semaphore.acquire()
+        self.active += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": self.queued,
+            "queue_size": self.queue_size,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
+
+
+class RateLimiter:
+    """Token bucket per client key; idle buckets are dropped by the underlying LRU."""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        # A bucket idle for burst / rate seconds is full again, so forgetting it changes nothing
+        self._buckets = TTLCache(maxsize=max_clients, ttl=max(burst / rate, 1.0) if rate > 0 else 1.0, clock=clock)
+        self.limited = 0
+
+    def check(self, key: str) -> None:
+        """Take one token for ``key`` or raise :class:`Overloaded`."""
+        now = self._clock()
+        tokens, last = self._buckets.get(key, (self.burst, now), record=False)
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        if tokens < 1.0:
+            self._buckets.set(key, (tokens, now))
+            self.limited += 1
+            retry_after = (1.0 - tokens) / self.rate
+            raise Overloaded(
+                f"Rate limit exceeded for this session ({self.rate:g} calls/s). Retry in {retry_after:.1f}s.",
+                "rate_limited",
+                retry_after,
+            )
+        self._buckets.set(key, (tokens - 1.0, now))
+
+    def stats(self) -> dict[str, Any]:
+        return {"rate": self.rate, "burst": self.burst, "clients": len(self._buckets), "limited": self.limited}
+
+
+def session_key() -> str | None:
+    """Key of the session the current tool call arrived on, if it has one.
+
+    SSE messages carry ``?session_id=``; stateful streamable HTTP sends an
+    ``mcp-session-id`` header. Stateless requests have no session and are not
+    rate limited.
+    """
+    context = request_ctx.get(None)
+    request = getattr(context, "request", None)
+    if request is None:
+        return None
+    session_id = request.query_params.get("session_id") or request.headers.get("mcp-session-id")
+    return f"session:{session_id}" if session_id else None
+
+
+class AdmissionController:
+    """Global and per-tool concurrency limits plus optional per-session rate limits."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 64,
+        tool_limits: dict[str, int] | None = None,
+        queue_size: int = 32,
+        queue_timeout: float | None = 10.0,
+        session_rate: float = 0.0,
+        session_burst: float | None = None,
+    ):
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.tool_limits = dict(DEFAULT_TOOL_LIMITS if tool_limits is None else tool_limits)
+        self.global_limit = ConcurrencyLimit("server", max_concurrency, queue_size, queue_timeout)
+        self._tools: dict[str, ConcurrencyLimit] = {}
+        self.rate_limiter = (
+            RateLimiter(session_rate, session_burst or max(2 * session_rate, 1.0)) if session_rate > 0 else None
+        )
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        tool_limits = dict(DEFAULT_TOOL_LIMITS)
+        tool_limits.update(parse_limits(os.environ.get("MCP_TOOL_CONCURRENCY", "")))
+        timeout = float(os.environ.get("MCP_QUEUE_TIMEOUT", 10.0))
+        burst = os.environ.get("MCP_SESSION_BURST")
+        return cls(
+            max_concurrency=int(os.environ.get("MCP_MAX_CONCURRENCY", 64)),
+            tool_limits=tool_limits,
+            queue_size=int(os.environ.get("MCP_QUEUE_SIZE", 32)),
+            queue_timeout=timeout if timeout > 0 else None,
+            session_rate=float(os.environ.get("MCP_SESSION_RATE", 0.0)),
+            session_burst=float(burst) if burst else None,
+        )
+
+    def tool_limit(self, tool: str) -> ConcurrencyLimit | None:
+        """The tool's own limit, created on first use; ``None`` if only the global limit applies."""
+        limit = self._tools.get(tool)
+        if limit is None and tool in self.tool_limits:
+            limit = self._tools[tool] = ConcurrencyLimit(tool, self.tool_limits[tool], self.queue_size, self.queue_timeout)
+        return limit
+
+    @contextlib.asynccontextmanager
+    async def admit(self, tool: str, client: str | None = None) -> AsyncIterator[None]:
+        """Hold a tool slot and a global slot for the duration of one call."""
+        if self.rate_limiter is not None and client is not None:
+            self.rate_limiter.check(client)
+        async with contextlib.AsyncExitStack() as stack:
+            # Tool slot first: a saturated tool queues without holding a global slot
+            limit = self.tool_limit(tool)
+            if limit is not None:
+                await stack.enter_async_context(limit.slot())
+            await stack.enter_async_context(self.global_limit.slot())
+            yield
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "global": self.global_limit.stats(),
+            "tools": {name: limit.stats() for name, limit in self._tools.items()},
+            "sessions": self.rate_limiter.stats() if self.rate_limiter else None,
+        }
+
+
+def guard_tool(fn: Callable, controller: AdmissionController, name: str | None = None) -> Callable:
+    """Wrap an async tool function so each call goes through ``controller``."""
+    tool = name or fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        async with controller.admit(tool, session_key()):
+            return await fn(*args, **kwargs)
+
+    return wrapper
+
+
+def guard_tools(mcp: Any, controller: AdmissionController) -> None:
+    """Put every later ``@mcp.tool()`` registration behind admission control."""
+    register = mcp.tool
+
+    @functools.wraps(register)
+    def tool(*args: Any, **kwargs: Any) -> Callable:
+        decorator = register(*args, **kwargs)
+        name = kwargs.get("name", args[0] if args else None)
+
+        def guarded(fn: Callable) -> Callable:
+            decorator(guard_tool(fn, controller, name))
+            return fn
+
+        return guarded
+
+    mcp.tool = tool
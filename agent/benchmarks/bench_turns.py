@@ -0,0 +1,103 @@
+"""
+Per-turn overhead of the agent's MCP setup, with and without the session pool.
+
+Each simulated turn does what chat_node does before and after the model call:
+it gets the MCP tools, gets a react agent over them and makes one tool call.
+The model itself is not called, so only the MCP and graph setup is timed.
+
+    python benchmarks/bench_turns.py                 # default config (math_server.py over stdio)
+    python benchmarks/bench_turns.py --turns 50
+    python benchmarks/bench_turns.py --sse http://localhost:8080/sse
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_openai import ChatOpenAI
+from langgraph.prebuilt import create_react_agent
+
+from sample_agent.mcp_pool import MCPSessionPool
+
+MATH_CONFIG = {
+    "math": {
+        "command": sys.executable,
+        "args": [os.path.join(ROOT, "math_server.py")],
+        "transport": "stdio",
+    },
+}
+
+
+def pick_tool(tools: list, name: str):
+    return next((tool for tool in tools if tool.name == name), None)
+
+
+async def cold_turn(mcp_config: dict, model: ChatOpenAI, tool_name: str, tool_args: dict) -> None:
+    """The original chat_node: new client, new tool list, new model and agent on every turn."""
+    async with MultiServerMCPClient(mcp_config) as client:
+        tools = client.get_tools()
+        model = ChatOpenAI(base_url=model.openai_api_base, api_key="bench", model=model.model_name)
+        create_react_agent(model, tools)
+        await pick_tool(tools, tool_name).ainvoke(tool_args)
+
+
+async def pooled_turn(pool: MCPSessionPool, mcp_config: dict, model: ChatOpenAI, tool_name: str, tool_args: dict) -> None:
+    async with pool.session(mcp_config) as session:
+        session.react_agent(model)
+        await pick_tool(session.tools, tool_name).ainvoke(tool_args)
+
+
+def summarize(latencies: list[float]) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "turns": len(ordered),
+        "first_ms": round(latencies[0], 2),
+        "mean_ms": round(statistics.fmean(ordered), 2),
+        "p50_ms": round(ordered[len(ordered) // 2], 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+    }
+
+
+async def measure(turn, turns: int) -> dict:
+    latencies = []
+    for _ in range(turns):
+        started = time.perf_counter()
+        await turn()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return summarize(latencies)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Time per-turn MCP setup with and without pooling")
+    parser.add_argument("--turns", type=int, default=20, help="Turns per mode")
+    parser.add_argument("--sse", help="Benchmark an SSE server instead of math_server.py, e.g. http://localhost:8080/sse")
+    parser.add_argument("--tool", default="add", help="Tool to call once per turn")
+    parser.add_argument("--args", default='{"a": 1, "b": 2}', help="JSON arguments for the tool")
+    args = parser.parse_args()
+
+    mcp_config = {"server": {"url": args.sse, "transport": "sse"}} if args.sse else MATH_CONFIG
+    tool_args = json.loads(args.args)
+    # Never called; only built, as chat_node builds it
+    model = ChatOpenAI(base_url="http://localhost:9/v1", api_key="bench", model="bench")
+
+    cold = await measure(lambda: cold_turn(mcp_config, model, args.tool, tool_args), args.turns)
+    pool = MCPSessionPool()
+    try:
+        pooled = await measure(lambda: pooled_turn(pool, mcp_config, model, args.tool, tool_args), args.turns)
+    finally:
+        await pool.aclose()
+
+    print(json.dumps({"cold": cold, "pooled": pooled,
+                      "speedup_p50": round(cold["p50_ms"] / pooled["p50_ms"], 1) if pooled["p50_ms"] else None}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
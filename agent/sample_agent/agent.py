@@ -7,14 +7,14 @@ from typing_extensions import Literal, TypedDict, Dict, List, Any, Union, Option
 from langchain_openai import ChatOpenAI
 from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.types import Command
 from copilotkit import CopilotKitState
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from langgraph.prebuilt import create_react_agent
 
 import os
 
+from sample_agent.checkpointer import create_checkpointer
+from sample_agent.mcp_pool import MCPSessionPool
+
 # Define GitHub model configuration
 GITHUB_TOKEN = os.environ["GITHUB_TOKEN"]
 GITHUB_ENDPOINT = "https://models.inference.ai.azure.com"
@@ -55,29 +55,39 @@ DEFAULT_MCP_CONFIG: MCPConfig = {
     },
 }
 
+# MCP sessions (stdio subprocesses, SSE connections), their tools and the compiled
+# react agent are kept warm between turns, per distinct mcp_config
+mcp_pool = MCPSessionPool.from_env()
+
+# Let the model request several independent tool calls per turn; they run concurrently.
+# Set to false for models that reject the parallel_tool_calls parameter.
+PARALLEL_TOOL_CALLS = os.environ.get("AGENT_PARALLEL_TOOL_CALLS", "true").lower() in ("1", "true", "yes")
+
+_model: Optional[ChatOpenAI] = None
+
+def get_model() -> ChatOpenAI:
+    """The chat model is stateless, so one instance serves every turn."""
+    global _model
+    if _model is None:
+        _model = ChatOpenAI(
+            base_url=GITHUB_ENDPOINT,
+            api_key=GITHUB_TOKEN,
+            model=GITHUB_MODEL_NAME)
+    return _model
+
 async def chat_node(state: AgentState, config: RunnableConfig) -> Command[Literal["__end__"]]:
     """
     This is a simplified agent that uses the ReAct agent as a subgraph.
     It handles both chat responses and tool execution in one node.
     """
     # Get MCP configuration from state, or use the default config if not provided
-    mcp_config = state.get("mcp_config", DEFAULT_MCP_CONFIG)
-
-    print(f"mcp_config: {mcp_config}, default: {DEFAULT_MCP_CONFIG}")
-    
-    # Set up the MCP client and tools using the configuration from state
-    async with MultiServerMCPClient(mcp_config) as mcp_client:
+    mcp_config = state.get("mcp_config") or DEFAULT_MCP_CONFIG
 
-        # Get the tools
-        mcp_tools = mcp_client.get_tools()
-        
-        # Create the react agent
-        model = ChatOpenAI(
-            base_url=GITHUB_ENDPOINT,
-            api_key=GITHUB_TOKEN,
-            model=GITHUB_MODEL_NAME)
+    # Reuse the pooled MCP session for this configuration (opened on first use)
+    async with mcp_pool.session(mcp_config) as mcp_session:
 
-        react_agent = create_react_agent(model, mcp_tools)
+        # Tools and the react agent come from the session, built once per connection
+        react_agent = mcp_session.react_agent(get_model(), PARALLEL_TOOL_CALLS)
         
         # Prepare messages for the react agent
         agent_input = {
@@ -87,13 +97,14 @@ async def chat_node(state: AgentState, config: RunnableConfig) -> Command[Litera
         # Run the react agent subgraph with our input
         agent_response = await react_agent.ainvoke(agent_input)
         
-        # Update the state with the new messages
-        updated_messages = state["messages"] + agent_response.get("messages", [])
+        # The response repeats the input history; only the messages after it are new.
+        # The messages reducer appends them, so the history is not copied into the state again.
+        new_messages = agent_response.get("messages", [])[len(state["messages"]):]
         
-        # End the graph with the updated messages
+        # End the graph with the new messages
         return Command(
             goto=END,
-            update={"messages": updated_messages},
+            update={"messages": new_messages},
         )
 
 # Define the workflow graph with only a chat node
@@ -101,5 +112,5 @@ workflow = StateGraph(AgentState)
 workflow.add_node("chat_node", chat_node)
 workflow.set_entry_point("chat_node")
 
-# Compile the workflow graph
-graph = workflow.compile(MemorySaver())
\ No newline at end of file
+# Compile the workflow graph with a bounded checkpointer (AGENT_CHECKPOINTER, AGENT_CHECKPOINT_* settings)
+graph = workflow.compile(create_checkpointer())
\ No newline at end of file
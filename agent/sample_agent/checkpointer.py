@@ -0,0 +1,210 @@
+"""
+Bounded checkpointers for the agent graph.
+
+MemorySaver keeps every checkpoint of every thread forever. Each checkpoint
+also stores a new version of the messages channel, so a long conversation
+grows quadratically. The savers here keep only the latest
+``keep_checkpoints`` checkpoints per thread, drop threads idle for longer
+than ``thread_ttl`` seconds, and keep at most ``max_threads`` threads (least
+recently used goes first).
+
+Subgraphs checkpoint under their own namespace, one per run (the react agent
+in ``chat_node`` uses ``chat_node:<task id>``), so every turn would leave a
+new namespace behind. A root checkpoint is only written once the step's
+subgraphs have finished, so saving one drops the thread's other namespaces.
+
+The backend is chosen with ``AGENT_CHECKPOINTER``:
+
+* ``memory`` (default): in-process ``BoundedMemorySaver``.
+* ``sqlite``: ``BoundedSqliteSaver`` in ``AGENT_CHECKPOINT_DB``. It needs
+  ``langgraph-checkpoint-sqlite``.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.memory import MemorySaver
+
+try:  # optional: pip install langgraph-checkpoint-sqlite
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+except ImportError:
+    aiosqlite = None
+    AsyncSqliteSaver = None
+
+
+class BoundedMemorySaver(MemorySaver):
+    """MemorySaver with per-thread history and thread-count/idle limits."""
+
+    def __init__(self, *, keep_checkpoints: int = 10, max_threads: int = 1000, thread_ttl: float = 86400.0, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.keep_checkpoints = keep_checkpoints
+        self.max_threads = max_threads
+        self.thread_ttl = thread_ttl
+        # (thread, ns, checkpoint id) -> channel versions, to know which blobs are still referenced
+        self._versions: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._blob_keys: Dict[Tuple[str, str], Set[Tuple[str, Any]]] = {}
+        self._threads: "OrderedDict[str, float]" = OrderedDict()
+
+    def put(self, config: RunnableConfig, checkpoint: Any, metadata: Any, new_versions: Any) -> RunnableConfig:
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        self._versions[(thread_id, checkpoint_ns, checkpoint["id"])] = dict(checkpoint["channel_versions"])
+        self._blob_keys.setdefault((thread_id, checkpoint_ns), set()).update(new_versions.items())
+        self._prune_history(thread_id, checkpoint_ns)
+        if checkpoint_ns == "":
+            self._drop_subgraphs(thread_id)
+        self._touch(thread_id)
+        return saved
+
+    def _prune_history(self, thread_id: str, checkpoint_ns: str) -> None:
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= self.keep_checkpoints:
+            return
+        # Checkpoint ids are time-ordered (uuid6)
+        ids = sorted(checkpoints)
+        for checkpoint_id in ids[:-self.keep_checkpoints]:
+            del checkpoints[checkpoint_id]
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            self._versions.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+        live = {
+            item
+            for checkpoint_id in ids[-self.keep_checkpoints:]
+            for item in self._versions.get((thread_id, checkpoint_ns, checkpoint_id), {}).items()
+        }
+        blob_keys = self._blob_keys[(thread_id, checkpoint_ns)]
+        for channel, version in blob_keys - live:
+            self.blobs.pop((thread_id, checkpoint_ns, channel, version), None)
+        blob_keys &= live
+
+    def _drop_subgraphs(self, thread_id: str) -> None:
+        """Forget the namespaces of the thread's finished subgraph runs."""
+        namespaces = self.storage[thread_id]
+        for checkpoint_ns in [ns for ns in namespaces if ns != ""]:
+            for checkpoint_id in namespaces.pop(checkpoint_ns):
+                self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+                self._versions.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            for channel, version in self._blob_keys.pop((thread_id, checkpoint_ns), ()):
+                self.blobs.pop((thread_id, checkpoint_ns, channel, version), None)
+
+    def _touch(self, thread_id: str) -> None:
+        now = time.monotonic()
+        self._threads[thread_id] = now
+        self._threads.move_to_end(thread_id)
+        # Oldest first: stop at the first thread that is recent enough and within the limit
+        while self._threads:
+            oldest, last_used = next(iter(self._threads.items()))
+            if len(self._threads) <= self.max_threads and now - last_used <= self.thread_ttl:
+                break
+            self.delete_thread(oldest)
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        self._threads.pop(thread_id, None)
+        for key in [key for key in self._versions if key[0] == thread_id]:
+            del self._versions[key]
+        for key in [key for key in self._blob_keys if key[0] == thread_id]:
+            del self._blob_keys[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"threads": len(self._threads), "checkpoints": len(self._versions), "blobs": len(self.blobs)}
+
+
+if AsyncSqliteSaver is not None:
+
+    class BoundedSqliteSaver(AsyncSqliteSaver):
+        """AsyncSqliteSaver with the same per-thread and thread-count/idle limits."""
+
+        def __init__(self, conn: Any, *, keep_checkpoints: int = 10, max_threads: int = 1000,
+                     thread_ttl: float = 86400.0, prune_interval: float = 60.0, **kwargs: Any):
+            super().__init__(conn, **kwargs)
+            self.keep_checkpoints = keep_checkpoints
+            self.max_threads = max_threads
+            self.thread_ttl = thread_ttl
+            self.prune_interval = prune_interval
+            self._activity_ready = False
+            self._last_thread_prune = 0.0
+
+        @classmethod
+        def from_path(cls, path: str, **kwargs: Any) -> "BoundedSqliteSaver":
+            # The connection is opened lazily by setup() on first use
+            return cls(aiosqlite.connect(path), **kwargs)
+
+        async def setup(self) -> None:
+            await super().setup()
+            if self._activity_ready:
+                return
+            async with self.lock:
+                await self.conn.execute(
+                    "CREATE TABLE IF NOT EXISTS thread_activity (thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)"
+                )
+                await self.conn.execute(
+                    "CREATE INDEX IF NOT EXISTS thread_activity_updated_at ON thread_activity (updated_at)"
+                )
+                await self.conn.commit()
+            self._activity_ready = True
+
+        async def aput(self, config: RunnableConfig, checkpoint: Any, metadata: Any, new_versions: Any) -> RunnableConfig:
+            saved = await super().aput(config, checkpoint, metadata, new_versions)
+            await self._prune(config["configurable"]["thread_id"], config["configurable"].get("checkpoint_ns", ""))
+            return saved
+
+        async def _prune(self, thread_id: str, checkpoint_ns: str) -> None:
+            await self.setup()
+            now = time.time()
+            async with self.lock:
+                keep = (
+                    "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT ?"
+                )
+                scope = (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.keep_checkpoints)
+                for table in ("checkpoints", "writes"):
+                    await self.conn.execute(
+                        f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ({keep})",
+                        scope,
+                    )
+                if checkpoint_ns == "":
+                    # Finished subgraph runs (see the module docstring)
+                    for table in ("checkpoints", "writes"):
+                        await self.conn.execute(f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns != ''", (thread_id,))
+                await self.conn.execute(
+                    "INSERT INTO thread_activity (thread_id, updated_at) VALUES (?, ?) "
+                    "ON CONFLICT(thread_id) DO UPDATE SET updated_at = excluded.updated_at",
+                    (thread_id, now),
+                )
+                if now - self._last_thread_prune >= self.prune_interval:
+                    self._last_thread_prune = now
+                    async with self.conn.execute(
+                        "SELECT thread_id FROM thread_activity WHERE updated_at < ? "
+                        "UNION SELECT thread_id FROM (SELECT thread_id FROM thread_activity "
+                        "ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                        (now - self.thread_ttl, self.max_threads),
+                    ) as cursor:
+                        expired = [(row[0],) for row in await cursor.fetchall()]
+                    for table in ("checkpoints", "writes", "thread_activity"):
+                        await self.conn.executemany(f"DELETE FROM {table} WHERE thread_id = ?", expired)
+                await self.conn.commit()
+
+else:
+    BoundedSqliteSaver = None
+
+
+def create_checkpointer(backend: Optional[str] = None) -> Any:
+    """Checkpointer for ``AGENT_CHECKPOINTER`` (``memory`` or ``sqlite``) with the AGENT_* limits."""
+    backend = (backend or os.environ.get("AGENT_CHECKPOINTER", "memory")).lower()
+    limits = {
+        "keep_checkpoints": int(os.environ.get("AGENT_CHECKPOINT_KEEP", 10)),
+        "max_threads": int(os.environ.get("AGENT_MAX_THREADS", 1000)),
+        "thread_ttl": float(os.environ.get("AGENT_THREAD_TTL", 86400.0)),
+    }
+    if backend == "memory":
+        return BoundedMemorySaver(**limits)
+    if backend == "sqlite":
+        if BoundedSqliteSaver is None:
+            raise ImportError("AGENT_CHECKPOINTER=sqlite needs langgraph-checkpoint-sqlite: pip install langgraph-checkpoint-sqlite")
+        return BoundedSqliteSaver.from_path(os.environ.get("AGENT_CHECKPOINT_DB", "checkpoints.sqlite"), **limits)
+    raise ValueError(f"Unsupported AGENT_CHECKPOINTER: {backend}")
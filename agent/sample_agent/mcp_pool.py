@@ -0,0 +1,201 @@
+"""
+Pool of warm MCP client sessions for the agent, keyed on the mcp_config contents.
+
+Opening a MultiServerMCPClient starts every stdio server as a subprocess and
+connects every SSE server, then lists their tools. Doing that on every turn
+dominates per-turn latency. The pool keeps one connected client per distinct
+mcp_config, together with its tool list and compiled react agent, and closes
+clients that have been idle for a while.
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+import anyio
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langgraph.prebuilt import ToolNode, create_react_agent
+
+# Errors that mean a pooled connection is dead (e.g. the stdio server exited)
+CONNECTION_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream, ConnectionError)
+
+
+def config_key(mcp_config: Dict[str, Any]) -> str:
+    """Stable key for a configuration: the same servers give the same key, in any order."""
+    return json.dumps(mcp_config, sort_keys=True, default=str)
+
+
+class PooledSession:
+    """
+    One connected MultiServerMCPClient plus everything derived from it.
+
+    The client is entered and exited by a dedicated task, because the stdio and
+    SSE transports must be closed by the task that opened them, and graph nodes
+    run in a different task on every turn.
+    """
+
+    def __init__(self, mcp_config: Dict[str, Any]):
+        self.mcp_config = mcp_config
+        self.client: Optional[MultiServerMCPClient] = None
+        self.tools: list = []
+        self.loop = asyncio.get_running_loop()
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.in_use = 0
+        self.turns = 0
+        self._agents: Dict[tuple, Any] = {}
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._error: Optional[BaseException] = None
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        try:
+            async with MultiServerMCPClient(self.mcp_config) as client:
+                self.client = client
+                # Tool schemas are listed once per connection, not once per turn
+                self.tools = client.get_tools()
+                self._ready.set()
+                await self._closing.wait()
+        except BaseException as e:
+            self._error = e
+            raise
+        finally:
+            self.client = None
+            self._ready.set()
+
+    async def wait_ready(self) -> None:
+        await self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        if self.client is None:
+            raise ConnectionError("MCP session closed")
+
+    @property
+    def alive(self) -> bool:
+        return not self._task.done() and self.loop is asyncio.get_running_loop()
+
+    def react_agent(self, model: Any, parallel_tool_calls: bool = True) -> Any:
+        """
+        Compiled react agent over this session's tools, built once per model.
+
+        ToolNode runs all tool calls of one model message concurrently, and each
+        call is its own request on the shared MCP session. With
+        ``parallel_tool_calls`` the model is also told it may emit several
+        independent calls in one message.
+        """
+        key = (id(model), parallel_tool_calls)
+        agent = self._agents.get(key)
+        if agent is None:
+            if parallel_tool_calls:
+                model = model.bind_tools(self.tools, parallel_tool_calls=True)
+            agent = self._agents[key] = create_react_agent(model, ToolNode(self.tools))
+        return agent
+
+    async def aclose(self) -> None:
+        self._closing.set()
+        with contextlib.suppress(BaseException):
+            await self._task
+
+
+class MCPSessionPool:
+    """
+    Keeps MCP sessions warm between turns.
+
+    Sessions idle for longer than ``idle_timeout`` seconds are closed, and at
+    most ``max_sessions`` distinct configurations are kept (least recently used
+    goes first). A session whose connection broke is dropped and reopened on
+    the next turn.
+    """
+
+    def __init__(self, idle_timeout: float = 300.0, max_sessions: int = 8,
+                 session_factory: Callable[[Dict[str, Any]], PooledSession] = PooledSession):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self._session_factory = session_factory
+        self._sessions: Dict[str, PooledSession] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.opened = 0
+        self.reused = 0
+        self.evicted = 0
+
+    @classmethod
+    def from_env(cls) -> "MCPSessionPool":
+        return cls(
+            idle_timeout=float(os.environ.get("MCP_POOL_IDLE_TIMEOUT", 300.0)),
+            max_sessions=int(os.environ.get("MCP_POOL_MAX_SESSIONS", 8)),
+        )
+
+    async def acquire(self, mcp_config: Dict[str, Any]) -> PooledSession:
+        """Return a connected session for the configuration, opening one if needed."""
+        key = config_key(mcp_config)
+        await self.evict_idle(keep=key)
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            session = self._sessions.get(key)
+            if session is not None and not session.alive:
+                await self._discard(key)
+                session = None
+            if session is None:
+                session = self._sessions[key] = self._session_factory(mcp_config)
+                self.opened += 1
+                try:
+                    await session.wait_ready()
+                except BaseException:
+                    await self._discard(key)
+                    raise
+            else:
+                self.reused += 1
+        session.last_used = time.monotonic()
+        return session
+
+    @contextlib.asynccontextmanager
+    async def session(self, mcp_config: Dict[str, Any]) -> AsyncIterator[PooledSession]:
+        """Use a pooled session for one turn; a broken connection is dropped from the pool."""
+        session = await self.acquire(mcp_config)
+        session.in_use += 1
+        try:
+            yield session
+            session.turns += 1
+        except CONNECTION_ERRORS:
+            await self._discard(config_key(mcp_config), session)
+            raise
+        finally:
+            session.in_use -= 1
+            session.last_used = time.monotonic()
+
+    async def evict_idle(self, keep: Optional[str] = None) -> None:
+        now = time.monotonic()
+        idle = [key for key, session in self._sessions.items()
+                if key != keep and session.in_use == 0 and now - session.last_used > self.idle_timeout]
+        # Over capacity: close the least recently used idle sessions
+        spare = sorted(
+            (key for key, session in self._sessions.items() if key != keep and key not in idle and session.in_use == 0),
+            key=lambda key: self._sessions[key].last_used,
+        )
+        excess = len(self._sessions) - len(idle) - self.max_sessions + (keep not in self._sessions)
+        for key in idle + spare[:max(0, excess)]:
+            self.evicted += 1
+            await self._discard(key)
+
+    async def _discard(self, key: str, session: Optional[PooledSession] = None) -> None:
+        current = self._sessions.get(key)
+        if current is None or (session is not None and current is not session):
+            return
+        del self._sessions[key]
+        await current.aclose()
+
+    async def aclose(self) -> None:
+        for key in list(self._sessions):
+            await self._discard(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "opened": self.opened,
+            "reused": self.reused,
+            "evicted": self.evicted,
+            "turns": {key: session.turns for key, session in self._sessions.items()},
+        }
@@ -0,0 +1,22 @@
+"""Importable ASGI entry point for multi-worker and replica deployments.
+
+``mcp-server.py`` cannot be imported by name (it contains a hyphen), so
+process managers load the app from here instead:
+
+    SESSION_BUS_URL=redis://localhost:6379/0 uvicorn asgi:app --workers 4 --port 8080
+"""
+import importlib.util
+import os
+
+_spec = importlib.util.spec_from_file_location(
+    "mcp_server", os.path.join(os.path.dirname(os.path.abspath(__file__)), "mcp-server.py")
+)
+mcp_server = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(mcp_server)
+
+# MCP_TRANSPORT: "sse", "streamable-http" or "both" (default); MCP_TOOL_GROUPS picks the tool groups (default all)
+_transport = os.environ.get("MCP_TRANSPORT", "both")
+app = mcp_server.create_starlette_app(
+    mcp_server.mcp._mcp_server,
+    transports=mcp_server.TRANSPORTS if _transport == "both" else (_transport,),
+)
@@ -0,0 +1,155 @@
+"""Paging engine and result cache for the Azure Retail Prices API.
+
+The API returns up to 1000 items per page plus a ``NextPageLink``. Pages are
+fetched through a one-page lookahead: as soon as a page arrives, the request
+for the next one is started, and only then is the current page parsed. Parsed
+items are cached per normalized OData filter, because retail prices rarely
+change and agents repeat the same filters.
+"""
+import asyncio
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable
+from urllib.parse import quote
+
+from cache import TTLCache
+
+API_VERSION = "2023-01-01-preview"
+
+# Item fields used by get_azure_price; everything else is dropped when parsing
+PRICE_FIELDS = ("productName", "skuName", "retailPrice", "unitOfMeasure", "armRegionName")
+
+_STRING_LITERAL = re.compile(r"('(?:[^']|'')*')")
+_WHITESPACE = re.compile(r"\s+")
+_PUNCTUATION_SPACE = re.compile(r" ?([(),]) ?")
+
+
+def normalize_filter(filter_expression: str) -> str:
+    """Canonical form of an OData filter, used as the cache key.
+
+    Whitespace outside quoted literals is collapsed and dropped around
+    parentheses and commas; the literals themselves are left untouched.
+    """
+    parts = _STRING_LITERAL.split(filter_expression.strip())
+    for i in range(0, len(parts), 2):
+        parts[i] = _PUNCTUATION_SPACE.sub(r"\1", _WHITESPACE.sub(" ", parts[i]))
+    return "".join(parts)
+
+
+def build_price_url(base_url: str, filter_expression: str | None = None) -> str:
+    """First-page URL for an (optional) OData filter."""
+    url = f"{base_url}?api-version={API_VERSION}"
+    if filter_expression:
+        # URL encode the filter expression
+        url += f"&$filter={quote(filter_expression)}"
+    return url
+
+
+def parse_items(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Keep only the fields that are shown to the agent."""
+    return [{key: item[key] for key in PRICE_FIELDS if key in item} for item in items]
+
+
+@dataclass
+class PriceResult:
+    """Parsed items for one filter and how the paging ended."""
+    items: list[dict[str, Any]] = field(default_factory=list)
+    pages: int = 0
+    truncated: bool = False  # more pages existed beyond the page budget
+    complete: bool = True  # False if a page request failed
+
+
+async def iter_price_pages(
+    first_url: str,
+    fetch_page: Callable[[str], Awaitable[dict[str, Any] | None]],
+    max_pages: int | None = None,
+) -> AsyncIterator[tuple[dict[str, Any] | None, bool]]:
+    """Yield ``(page, has_more)`` following ``NextPageLink``, prefetching one page ahead.
+
+    ``page`` is ``None`` when a request failed, which ends the iteration.
+    ``has_more`` is true on the last page yielded within ``max_pages`` when
+    the API still had further pages.
+    """
+    pages = 0
+    pending: asyncio.Future | None = asyncio.ensure_future(fetch_page(first_url))
+    try:
+        while pending is not None:
+            data = await pending
+            pending = None
+            pages += 1
+            if not data:
+                yield None, False
+                return
+
+            next_page_url = data.get("NextPageLink") or ""
+            if next_page_url and (max_pages is None or pages < max_pages):
+                # Start the next request before the caller parses this page
+                pending = asyncio.ensure_future(fetch_page(next_page_url))
+            yield data, bool(next_page_url)
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+async def fetch_price_pages(
+    first_url: str,
+    fetch_page: Callable[[str], Awaitable[dict[str, Any] | None]],
+    max_pages: int,
+) -> PriceResult:
+    """Follow ``NextPageLink`` up to ``max_pages`` pages and parse the items."""
+    result = PriceResult()
+    async for data, has_more in iter_price_pages(first_url, fetch_page, max_pages):
+        result.pages += 1
+        if data is None:
+            result.complete = False
+            break
+        result.truncated = has_more and result.pages >= max_pages
+        result.items.extend(parse_items(data.get("Items") or []))
+    return result
+
+
+class PriceCache:
+    """TTL cache of ``PriceResult`` keyed on (normalized filter, page budget).
+
+    Expired results are kept for another ``stale_ttl`` seconds as a fallback
+    for when the API is failing (see :meth:`get_stale`).
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 3600.0, stale_ttl: float = 86400.0):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._stale = TTLCache(maxsize=maxsize, ttl=ttl + stale_ttl) if stale_ttl > 0 else None
+        self.stale_served = 0
+
+    @classmethod
+    def from_env(cls) -> "PriceCache":
+        return cls(
+            maxsize=int(os.environ.get("AZURE_PRICE_CACHE_SIZE", 256)),
+            ttl=float(os.environ.get("AZURE_PRICE_CACHE_TTL", 3600.0)),
+            stale_ttl=float(os.environ.get("AZURE_PRICE_CACHE_STALE_TTL", 86400.0)),
+        )
+
+    def get(self, filter_expression: str, max_pages: int) -> PriceResult | None:
+        return self._cache.get((normalize_filter(filter_expression), max_pages))
+
+    def get_stale(self, filter_expression: str, max_pages: int) -> PriceResult | None:
+        """Last complete result for the filter, even if expired; ``None`` if there is none."""
+        if self._stale is None:
+            return None
+        result = self._stale.get((normalize_filter(filter_expression), max_pages), record=False)
+        if result is not None:
+            self.stale_served += 1
+        return result
+
+    def put(self, filter_expression: str, max_pages: int, result: PriceResult) -> None:
+        # Failed fetches are not cached so the next call retries the API
+        if result.complete:
+            key = (normalize_filter(filter_expression), max_pages)
+            self._cache.set(key, result)
+            if self._stale is not None:
+                self._stale.set(key, result)
+
+    def stats(self) -> dict[str, Any]:
+        stats = self._cache.stats()
+        stats["stale_served"] = self.stale_served
+        return stats
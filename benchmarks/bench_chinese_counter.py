@@ -0,0 +1,103 @@
+"""Throughput benchmark for the Chinese character counter.
+
+Compares the original ``re.findall`` approach with the regex and NumPy paths
+of ``function/chinese_counter.py`` on multi-megabyte synthetic texts:
+
+    python benchmarks/bench_chinese_counter.py              # 1, 4 and 16 MB
+    python benchmarks/bench_chinese_counter.py --sizes 64   # custom sizes in MB
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from function import chinese_counter  # noqa: E402
+
+# Mostly basic ideographs with some Extension A/B, punctuation and ASCII
+_ALPHABET = (
+    [chr(c) for c in range(0x4E00, 0x4E00 + 400)]
+    + [chr(c) for c in range(0x3400, 0x3400 + 20)]
+    + [chr(c) for c in range(0x20000, 0x20000 + 5)]
+    + list("，。！？“”《》、：；") + list("abcdefg 0123456789\n")
+)
+
+
+def synthetic_text(size_mb: float, seed: int = 0) -> str:
+    """Random text of about ``size_mb`` megabytes in UTF-8 (~3 bytes per character)."""
+    rng = random.Random(seed)
+    return "".join(rng.choices(_ALPHABET, k=int(size_mb * 1_000_000 / 3)))
+
+
+def findall_count(text: str) -> int:
+    """The counting code previously run by the Azure Function."""
+    return len(re.findall(r"[一-鿿]", text))
+
+
+def regex_count(text: str, categories: tuple[str, ...]) -> dict[str, int]:
+    numpy, chinese_counter.np = chinese_counter.np, None
+    try:
+        return chinese_counter.count_by_category(text, categories)
+    finally:
+        chinese_counter.np = numpy
+
+
+def best_of(fn, repeat: int) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def bench(size_mb: float, repeat: int) -> dict:
+    text = synthetic_text(size_mb)
+    megabytes = len(text.encode("utf-8")) / 1_000_000
+    all_categories = chinese_counter.select_categories(ext_a=True, ext_b=True, punctuation=True)
+
+    runs = {
+        "findall": lambda: findall_count(text),
+        "regex": lambda: regex_count(text, ("basic",))["basic"],
+        "numpy": lambda: chinese_counter.count_by_category(text)["basic"],
+        "regex_all_categories": lambda: regex_count(text, all_categories),
+        "numpy_all_categories": lambda: chinese_counter.count_by_category(text, all_categories),
+    }
+    results = {"size_mb": round(megabytes, 2), "characters": len(text)}
+    outputs = {}
+    for name, fn in runs.items():
+        if name.startswith("numpy") and chinese_counter.np is None:
+            continue
+        seconds, outputs[name] = best_of(fn, repeat)
+        results[f"{name}_ms"] = round(seconds * 1000, 2)
+        results[f"{name}_mb_per_s"] = round(megabytes / seconds, 1)
+
+    # Every path has to agree with the original count
+    assert outputs["regex"] == outputs["findall"], outputs
+    assert outputs.get("numpy", outputs["findall"]) == outputs["findall"], outputs
+    assert outputs.get("numpy_all_categories", outputs["regex_all_categories"]) == outputs["regex_all_categories"], outputs
+    results["count"] = outputs["findall"]
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Chinese character counting throughput")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 4, 16], help="Input sizes in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported)")
+    parser.add_argument("--json", help="Write benchmark results to this file")
+    args = parser.parse_args()
+
+    results = [bench(size, args.repeat) for size in args.sizes]
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+"""Offline load benchmark for the MCP server.
+
+Starts the app from ``create_starlette_app`` in-process and points every
+upstream at local stub servers with configurable latency. Those upstreams are
+NWS, Azure prices, the character-count function, Supabase and Azure OpenAI.
+The benchmark then drives N concurrent clients that call a weighted mix of
+tools, over SSE, stateless streamable HTTP, or both in turn:
+
+    python benchmarks/bench_server.py                          # both transports, 20 clients x 25 calls
+    python benchmarks/bench_server.py --transport sse --clients 50 --upstream-latency 80
+    python benchmarks/bench_server.py --short-lived            # new connection per call
+    python benchmarks/bench_server.py --json run.json --compare baseline.json
+
+It reports requests/sec, TCP connections accepted by the server, per-tool
+p50/p95/p99 latency and process memory growth. Clients and server share the
+process, so memory growth covers both.
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import json
+import os
+import random
+import resource
+import socket
+import statistics
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+EMBEDDING_DIM = 1536
+
+# (tool, weight, argument variants)
+TOOL_MIX = [
+    ("get_forecast", 3, [{"latitude": 39.7456, "longitude": -97.0892}, {"latitude": 40.7128, "longitude": -74.006},
+                         {"latitude": 34.0522, "longitude": -118.2437}]),
+    ("get_alerts", 2, [{"state": "CA"}, {"state": "NY"}, {"state": "TX"}]),
+    ("get_azure_price", 2, [{"filter_expression": "contains(armSkuName, 'Standard_D2_v3') and armRegionName eq 'eastus'"},
+                            {"filter_expression": "serviceName eq 'Storage' and armRegionName eq 'westeurope'"}]),
+    ("count_chinese_characters", 2, [{"text": "中华人民共和国刑法" * 50}, {"text": "交通肇事罪，处三年以下有期徒刑。" * 200}]),
+    ("search_by_content", 2, [{"content": "交通肇事"}, {"content": "盗窃公私财物"}]),
+    ("get_article_by_code", 2, [{"article_code": 133}, {"article_code": 264, "sub_article_code": 1}]),
+    ("gdpr_semantic_search", 1, [{"query_text": "right to erasure"}, {"query_text": "data breach notification"}]),
+    ("China_pipl_semantic_search", 1, [{"query_text": "个人信息出境"}, {"query_text": "敏感个人信息"}]),
+]
+
+
+###########################
+#####stub upstreams
+###########################
+def create_stub_app(latency_ms: float, jitter_ms: float) -> Starlette:
+    rng = random.Random(0)
+
+    async def delay() -> None:
+        await asyncio.sleep(max(0.0, latency_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000)
+
+    def base(request: Request) -> str:
+        return f"{request.url.scheme}://{request.url.netloc}"
+
+    async def nws_points(request: Request) -> JSONResponse:
+        await delay()
+        lat, lon = request.path_params["coords"].split(",")
+        x, y = int(abs(float(lat)) * 10) % 100, int(abs(float(lon)) * 10) % 100
+        return JSONResponse({"properties": {
+            "forecast": f"{base(request)}/nws/gridpoints/TST/{x},{y}/forecast", "gridId": "TST", "gridX": x, "gridY": y,
+        }}, headers={"Cache-Control": "public, max-age=86400"})
+
+    async def nws_forecast(request: Request) -> JSONResponse:
+        await delay()
+        periods = [{"name": f"Period {i}", "temperature": 60 + i, "temperatureUnit": "F", "windSpeed": "10 mph",
+                    "windDirection": "NW", "detailedForecast": "Partly cloudy."} for i in range(14)]
+        return JSONResponse({"properties": {"periods": periods}}, headers={"Cache-Control": "public, max-age=5", "ETag": '"f1"'})
+
+    async def nws_alerts(request: Request) -> JSONResponse:
+        await delay()
+        features = [{"properties": {"event": "Heat Advisory", "areaDesc": request.path_params["state"], "severity": "Moderate",
+                                    "description": "Hot conditions.", "instruction": "Drink water."}}] * 3
+        return JSONResponse({"features": features}, headers={"Cache-Control": "public, max-age=5"})
+
+    async def prices(request: Request) -> JSONResponse:
+        await delay()
+        page = int(request.query_params.get("page", 0))
+        items = [{"productName": "Virtual Machines Dv3 Series", "skuName": f"D{i} v3", "retailPrice": 0.1 * i,
+                  "unitOfMeasure": "1 Hour", "armRegionName": "eastus", "armSkuName": f"Standard_D{i}_v3",
+                  "serviceName": "Virtual Machines", "type": "Consumption"} for i in range(100)]
+        next_page = f"{base(request)}/prices?page={page + 1}" if page < 1 else None
+        return JSONResponse({"Items": items, "NextPageLink": next_page})
+
+    async def char_count(request: Request) -> PlainTextResponse:
+        await delay()
+        text = (await request.body()).decode("utf-8") or request.query_params.get("text", "")
+        count = sum(1 for ch in text if "一" <= ch <= "鿿")
+        return PlainTextResponse(f"这段中文的字数是: {count}个字")
+
+    async def supabase_rpc(request: Request) -> JSONResponse:
+        await delay()
+        rows = [{"id": i, "content": f"Document {i}", "metadata": {"source": request.path_params["name"]}, "similarity": 0.9 - i / 10}
+                for i in range(3)]
+        return JSONResponse(rows)
+
+    async def embeddings(request: Request) -> JSONResponse:
+        await delay()
+        inputs = (await request.json())["input"]
+        inputs = inputs if isinstance(inputs, list) else [inputs]
+        data = [{"object": "embedding", "index": i, "embedding": [random.Random(str(text)).random() for _ in range(EMBEDDING_DIM)]}
+                for i, text in enumerate(inputs)]
+        return JSONResponse({"object": "list", "data": data, "model": "text-embedding-ada-002",
+                             "usage": {"prompt_tokens": 1, "total_tokens": 1}})
+
+    return Starlette(routes=[
+        Route("/nws/points/{coords}", nws_points),
+        Route("/nws/gridpoints/{grid}/{xy}/forecast", nws_forecast),
+        Route("/nws/alerts/active/area/{state}", nws_alerts),
+        Route("/prices", prices),
+        Route("/count", char_count, methods=["GET", "POST"]),
+        Route("/supabase/rest/v1/rpc/{name}", supabase_rpc, methods=["POST"]),
+        Route("/openai/openai/deployments/{deployment}/embeddings", embeddings, methods=["POST"]),
+    ])
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve_in_thread(app, port: int) -> uvicorn.Server:
+    """Run an ASGI app on its own event loop in a daemon thread."""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+    threading.Thread(target=server.run, daemon=True).start()
+    return server
+
+
+def wait_until_up(url: str, timeout: float = 120.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=2.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def wait_until_warm(stats_url: str, timeout: float = 120.0) -> None:
+    """Tool groups warm up in the background; measure the warm server, as before."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        groups = httpx.get(stats_url, timeout=2.0).json()["tool_groups"]
+        if all(group["warmup"] in (None, "done", "failed") for group in groups.values()):
+            return
+        time.sleep(0.2)
+    raise RuntimeError(f"tool groups did not warm up within {timeout}s")
+
+
+def point_upstreams_at(stub: str, remote_char_count: bool) -> None:
+    """Environment read by mcp-server.py at import time."""
+    os.environ.update({
+        "NWS_API_BASE": f"{stub}/nws",
+        "AZURE_PRICE_API_BASE": f"{stub}/prices",
+        "CHAR_COUNT_FUNCTION_URL": f"{stub}/count",
+        "CHAR_COUNT_MODE": "remote" if remote_char_count else "local",
+        "SUPABASE_URL": f"{stub}/supabase",
+        "SUPABASE_KEY": "bench.bench.bench",
+        "AZURE_OPENAI_ENDPOINT": f"{stub}/openai",
+        "AZURE_OPENAI_API_KEY": "bench",
+        "AZURE_OPENAI_API_VERSION": "2024-02-01",
+        "HTTP_POOL_HTTP2": "false",
+    })
+    for name in ("AZURE_PRICE_CATALOG_DIR", "NWS_GRID_CACHE_PATH", "EMBEDDING_CACHE_PATH"):
+        os.environ.pop(name, None)
+
+
+def load_server():
+    spec = importlib.util.spec_from_file_location("mcp_server", os.path.join(ROOT, "mcp-server.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    # Register the tools now, so the override below replaces the group's own factory
+    module.tool_groups.load_groups()
+
+    def offline_embedding_model():
+        # tiktoken downloads its encoding on first use; skip token-length checks offline
+        from langchain_openai import AzureOpenAIEmbeddings
+        return AzureOpenAIEmbeddings(azure_deployment="text-embedding-ada-002", model="text-embedding-ada-002",
+                                     api_version=os.environ["AZURE_OPENAI_API_VERSION"], check_embedding_ctx_length=False)
+
+    module.resources.register("embedding_model", offline_embedding_model)
+    return module
+
+
+###########################
+#####load generation
+###########################
+def rss_mb() -> float:
+    """Current resident set size (Linux), falling back to the peak RSS."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class ConnectionCounter:
+    """ASGI wrapper counting distinct client (host, port) pairs, i.e. TCP connections."""
+
+    def __init__(self, app):
+        self.app = app
+        self.clients: set[tuple] = set()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope.get("client"):
+            self.clients.add(tuple(scope["client"]))
+        await self.app(scope, receive, send)
+
+
+@contextlib.asynccontextmanager
+async def sse_session(base_url: str):
+    """One SSE client session; yields ``call(tool, arguments) -> ok``."""
+    from mcp import ClientSession
+    from mcp.client.sse import sse_client
+
+    async with sse_client(f"{base_url}/sse") as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+
+            async def call(tool: str, arguments: dict) -> bool:
+                return not (await session.call_tool(tool, arguments)).isError
+
+            yield call
+
+
+@contextlib.asynccontextmanager
+async def streamable_http_session(base_url: str):
+    """Stateless streamable-HTTP client: each tool call is one POST to /mcp with a JSON reply."""
+    headers = {"Accept": "application/json, text/event-stream"}
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=60.0) as client:
+        ids = iter(range(1, 1 << 30))
+
+        async def call(tool: str, arguments: dict) -> bool:
+            message = {"jsonrpc": "2.0", "id": next(ids), "method": "tools/call",
+                       "params": {"name": tool, "arguments": arguments}}
+            response = await client.post("/mcp", json=message)
+            result = response.json().get("result") if response.status_code == 200 else None
+            return result is not None and not result.get("isError")
+
+        yield call
+
+
+SESSIONS = {"sse": sse_session, "streamable-http": streamable_http_session}
+
+
+async def run_client(open_session, base_url: str, client_id: int, calls: int, warmup: int,
+                     short_lived: bool, samples: dict) -> None:
+    rng = random.Random(client_id)
+    weights = [weight for _, weight, _ in TOOL_MIX]
+
+    async def timed_call(call, i: int) -> None:
+        tool, _, variants = rng.choices(TOOL_MIX, weights)[0]
+        started = time.perf_counter()
+        try:
+            ok = await call(tool, rng.choice(variants))
+        except Exception:
+            ok = False
+        elapsed = (time.perf_counter() - started) * 1000
+        if i >= warmup:
+            samples.setdefault(tool, []).append((elapsed, ok))
+
+    if short_lived:
+        # Connect, call and disconnect every time; connection setup counts toward latency
+        for i in range(warmup + calls):
+            started = time.perf_counter()
+            async with open_session(base_url) as call:
+                await timed_call(call, i)
+            if i >= warmup:
+                samples.setdefault("_session", []).append(((time.perf_counter() - started) * 1000, True))
+        return
+    async with open_session(base_url) as call:
+        for i in range(warmup + calls):
+            await timed_call(call, i)
+
+
+async def drive(transport: str, base_url: str, clients: int, calls: int, warmup: int, short_lived: bool) -> tuple[dict, float]:
+    samples: dict[str, list[tuple[float, bool]]] = {}
+    started = time.perf_counter()
+    await asyncio.gather(*(run_client(SESSIONS[transport], base_url, i, calls, warmup, short_lived, samples)
+                           for i in range(clients)))
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples: dict, elapsed: float, rss_before: float, rss_after: float, connections: int) -> dict:
+    tools = {}
+    for tool, values in sorted(samples.items()):
+        latencies = [ms for ms, _ in values]
+        tools[tool] = {
+            "count": len(values),
+            "errors": sum(1 for _, ok in values if not ok),
+            "mean_ms": round(statistics.fmean(latencies), 3),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+        }
+    # "_session" (short-lived mode) is connect + call + disconnect, not a separate request
+    calls = {tool: stats for tool, stats in tools.items() if not tool.startswith("_")}
+    total = sum(tool["count"] for tool in calls.values())
+    return {
+        "requests": total,
+        "errors": sum(tool["errors"] for tool in calls.values()),
+        "duration_s": round(elapsed, 3),
+        "requests_per_s": round(total / elapsed, 1) if elapsed else 0.0,
+        "connections": connections,
+        "tools": tools,
+        "memory": {"rss_before_mb": round(rss_before, 1), "rss_after_mb": round(rss_after, 1),
+                   "rss_growth_mb": round(rss_after - rss_before, 1)},
+    }
+
+
+def compare(result: dict, baseline_path: str) -> None:
+    """Print per-tool p50/p95 and throughput changes against an earlier --json run."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    def change(new: float, old: float) -> str:
+        return f"{new:.2f} ({(new - old) / old * 100:+.1f}%)" if old else f"{new:.2f}"
+
+    for transport, run in result["runs"].items():
+        old_run = baseline["runs"].get(transport)
+        if not old_run:
+            continue
+        print(f"[{transport}] requests/s: {change(run['requests_per_s'], old_run['requests_per_s'])}, "
+              f"connections: {run['connections']} (was {old_run['connections']})")
+        for tool, stats in run["tools"].items():
+            old = old_run["tools"].get(tool)
+            if old:
+                print(f"  {tool}: p50 {change(stats['p50_ms'], old['p50_ms'])} ms, p95 {change(stats['p95_ms'], old['p95_ms'])} ms")
+
+
+def print_transport_comparison(runs: dict) -> None:
+    """Side-by-side summary when both transports were measured in one run."""
+    print(f"{'transport':<16}{'req/s':>9}{'conns':>8}{'p50 ms':>10}{'p95 ms':>10}")
+    for transport, run in runs.items():
+        latencies = [stats for tool, stats in run["tools"].items() if not tool.startswith("_")]
+        p50 = statistics.median(stats["p50_ms"] for stats in latencies)
+        p95 = max(stats["p95_ms"] for stats in latencies)
+        print(f"{transport:<16}{run['requests_per_s']:>9}{run['connections']:>8}{p50:>10.2f}{p95:>10.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the MCP server against stub upstreams")
+    parser.add_argument("--clients", type=int, default=20, help="Concurrent clients")
+    parser.add_argument("--calls", type=int, default=25, help="Timed tool calls per client")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed calls per client before measuring")
+    parser.add_argument("--transport", choices=["sse", "streamable-http", "both"], default="both",
+                        help="Client transport; 'both' runs SSE then streamable HTTP against the same server")
+    parser.add_argument("--short-lived", action="store_true", help="Open a new client connection for every call")
+    parser.add_argument("--upstream-latency", type=float, default=50.0, help="Stub upstream latency in ms")
+    parser.add_argument("--upstream-jitter", type=float, default=10.0, help="Uniform +/- jitter on the latency in ms")
+    parser.add_argument("--remote-char-count", action="store_true", help="Count characters through the function stub")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--compare", help="Compare with the results of an earlier --json run")
+    args = parser.parse_args()
+
+    stub_port, server_port = free_port(), free_port()
+    stub = f"http://127.0.0.1:{stub_port}"
+    serve_in_thread(create_stub_app(args.upstream_latency, args.upstream_jitter), stub_port)
+    wait_until_up(f"{stub}/prices")
+
+    point_upstreams_at(stub, args.remote_char_count)
+    srv = load_server()
+    counter = ConnectionCounter(srv.create_starlette_app(srv.mcp._mcp_server))
+    server = serve_in_thread(counter, server_port)
+    base_url = f"http://127.0.0.1:{server_port}"
+    wait_until_up(f"{base_url}/stats")
+    wait_until_warm(f"{base_url}/stats")
+
+    runs = {}
+    for transport in (["sse", "streamable-http"] if args.transport == "both" else [args.transport]):
+        counter.clients.clear()
+        rss_before = rss_mb()
+        samples, elapsed = asyncio.run(drive(transport, base_url, args.clients, args.calls, args.warmup, args.short_lived))
+        runs[transport] = summarize(samples, elapsed, rss_before, rss_mb(), len(counter.clients))
+    server.should_exit = True
+
+    config = {key: value for key, value in vars(args).items() if key not in ("json", "compare")}
+    result = {"config": config, "runs": runs}
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    if len(runs) > 1:
+        print_transport_comparison(runs)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Startup cost of the MCP server per tool group.
+
+Every configuration is measured in a fresh interpreter, so module caches from
+one run never hide the imports of another. For each tool group (plus ``none``,
+which is the server core alone, and ``all``), the benchmark reports:
+
+* import: time to import ``mcp-server.py`` and register the group's tools,
+  which is what a cold start waits for before accepting connections;
+* rss: resident memory at that point;
+* warm-up: time the group's background ``warmup()`` takes once the server is
+  up (heavy SDK imports, index builds), and the resident memory after it.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 5 --json startup.json
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CONFIGURATIONS = ["none", "legal", "weather", "pricing", "vector_search", "utility", "all"]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status", encoding="ascii") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def measure(groups: str) -> dict:
+    """Runs in the child interpreter: import, register and warm up ``groups``."""
+    os.environ["MCP_TOOL_GROUPS"] = groups
+    started = time.perf_counter()
+    spec = importlib.util.spec_from_file_location("mcp_server", os.path.join(ROOT, "mcp-server.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    loaded = module.tool_groups.load_groups()
+    import_ms = (time.perf_counter() - started) * 1000
+    rss_import = rss_mb()
+
+    async def warm() -> None:
+        await asyncio.gather(*module.tool_groups.start_warmups(loaded))
+
+    started = time.perf_counter()
+    asyncio.run(warm())
+    warmup_ms = (time.perf_counter() - started) * 1000
+    module.shutdown_executor()
+    return {
+        "import_ms": round(import_ms, 1),
+        "rss_mb": round(rss_import, 1),
+        "warmup_ms": round(warmup_ms, 1),
+        "rss_warm_mb": round(rss_mb(), 1),
+        "tools": len(module.mcp._tool_manager.list_tools()),  # noqa: SLF001
+    }
+
+
+def run_child(groups: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", groups],
+        check=True, capture_output=True, text=True, cwd=ROOT,
+    ).stdout
+    # The result is the last line of stdout; warm-up progress is logged to stderr
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure import time and memory per tool group")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh processes per configuration (medians are reported)")
+    parser.add_argument("--groups", default=",".join(CONFIGURATIONS), help="Configurations to measure")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(measure(args.child)))
+        return
+
+    results = {}
+    for groups in args.groups.split(","):
+        runs = [run_child(groups) for _ in range(args.repeat)]
+        results[groups] = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+    print(f"{'groups':<15} {'tools':>5} {'import ms':>10} {'rss MB':>8} {'warm-up ms':>11} {'warm rss MB':>12}")
+    for groups, result in results.items():
+        print(f"{groups:<15} {result['tools']:>5} {result['import_ms']:>10.1f} {result['rss_mb']:>8.1f} "
+              f"{result['warmup_ms']:>11.1f} {result['rss_warm_mb']:>12.1f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"repeat": args.repeat, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Offline check and benchmark for the local vector index.
+
+Runs entirely without network access:
+
+    python benchmarks/bench_vector_index.py                 # fixture check + benchmark
+    python benchmarks/bench_vector_index.py --docs 50000    # larger synthetic corpus
+    python benchmarks/bench_vector_index.py --write-fixture # regenerate fixtures/*.json
+
+Fixture embeddings come from a deterministic hashed bag-of-words model
+(``hashed_embedding``), so fixture queries can be embedded offline as well.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from vector_index import LocalVectorIndex  # noqa: E402
+
+FIXTURE_DIR = os.path.join(ROOT, "fixtures")
+FIXTURE_DIM = 128
+
+GDPR_FIXTURE_DOCS = [
+    ("Article 5", "Personal data shall be processed lawfully, fairly and in a transparent manner in relation to the data subject."),
+    ("Article 6", "Processing shall be lawful only if the data subject has given consent to the processing of his or her personal data for one or more specific purposes."),
+    ("Article 7", "Where processing is based on consent, the controller shall be able to demonstrate that the data subject has consented to processing."),
+    ("Article 9", "Processing of special categories of personal data revealing racial or ethnic origin, political opinions or health data shall be prohibited."),
+    ("Article 15", "The data subject shall have the right to obtain from the controller confirmation as to whether or not personal data concerning him or her are being processed."),
+    ("Article 17", "The data subject shall have the right to obtain from the controller the erasure of personal data concerning him or her without undue delay."),
+    ("Article 20", "The data subject shall have the right to receive the personal data in a structured, commonly used and machine-readable format (data portability)."),
+    ("Article 25", "The controller shall implement appropriate technical and organisational measures for data protection by design and by default."),
+    ("Article 32", "The controller and the processor shall implement appropriate technical and organisational measures to ensure a level of security appropriate to the risk."),
+    ("Article 33", "In the case of a personal data breach, the controller shall notify the supervisory authority within 72 hours after having become aware of it."),
+    ("Article 37", "The controller and the processor shall designate a data protection officer where processing is carried out by a public authority."),
+    ("Article 83", "Infringements shall be subject to administrative fines up to 20 000 000 EUR, or up to 4 % of the total worldwide annual turnover."),
+]
+
+PIPL_FIXTURE_DOCS = [
+    ("第十三条", "符合下列情形之一的，个人信息处理者方可处理个人信息：取得个人的同意；为订立、履行个人作为一方当事人的合同所必需。"),
+    ("第十四条", "基于个人同意处理个人信息的，该同意应当由个人在充分知情的前提下自愿、明确作出。"),
+    ("第二十八条", "敏感个人信息是一旦泄露或者非法使用，容易导致自然人的人格尊严受到侵害或者人身、财产安全受到危害的个人信息。"),
+    ("第三十八条", "个人信息处理者因业务等需要，确需向中华人民共和国境外提供个人信息的，应当通过国家网信部门组织的安全评估。"),
+    ("第四十四条", "个人对其个人信息的处理享有知情权、决定权，有权限制或者拒绝他人对其个人信息进行处理。"),
+    ("第四十七条", "有下列情形之一的，个人信息处理者应当主动删除个人信息；个人信息处理者未删除的，个人有权请求删除。"),
+    ("第五十一条", "个人信息处理者应当采取相应的加密、去标识化等安全技术措施，确保个人信息处理活动符合法律、行政法规的规定。"),
+    ("第五十七条", "发生或者可能发生个人信息泄露、篡改、丢失的，个人信息处理者应当立即采取补救措施，并通知履行个人信息保护职责的部门和个人。"),
+    ("第六十六条", "违反本法规定处理个人信息的，由履行个人信息保护职责的部门责令改正，处五千万元以下或者上一年度营业额百分之五以下罚款。"),
+]
+
+FIXTURE_QUERIES = {
+    "gdpr": ["right to erasure of personal data", "data breach notification", "consent of the data subject"],
+    "pipl": ["个人信息泄露", "向境外提供个人信息", "敏感个人信息"],
+}
+
+_TOKEN = re.compile(r"[一-鿿]|[a-z0-9]+")
+_STOPWORDS = {"a", "an", "and", "as", "be", "by", "for", "in", "is", "it", "of", "or", "shall", "the", "to", "with",
+              "的", "或", "者", "个", "人", "信", "息"}
+
+
+def hashed_embedding(text: str, dim: int = FIXTURE_DIM) -> list[float]:
+    """Deterministic bag-of-tokens embedding (CJK characters and lowercase words)."""
+    vector = np.zeros(dim, dtype=np.float64)
+    for token in _TOKEN.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        vector[int.from_bytes(digest, "little") % dim] += 1.0
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).round(6).tolist()
+
+
+def fixture_path(corpus: str) -> str:
+    return os.path.join(FIXTURE_DIR, f"{corpus}_corpus.json")
+
+
+def write_fixtures() -> None:
+    for corpus, docs, source in (("gdpr", GDPR_FIXTURE_DOCS, "GDPR"), ("pipl", PIPL_FIXTURE_DOCS, "PIPL")):
+        rows = [
+            {"id": i + 1, "content": content, "metadata": {"source": source, "article": article},
+             "embedding": hashed_embedding(content)}
+            for i, (article, content) in enumerate(docs)
+        ]
+        with open(fixture_path(corpus), "w", encoding="utf-8") as f:
+            f.write("[\n" + ",\n".join(json.dumps(row, ensure_ascii=False) for row in rows) + "\n]\n")
+        print(f"wrote {len(rows)} documents to {fixture_path(corpus)}")
+
+
+def reference_match(rows: list[dict], query: list[float], match_threshold: float, match_count: int) -> list[dict]:
+    """Plain-Python equivalent of the match_documents SQL, used to verify the index."""
+    q = np.asarray(query, dtype=np.float64)
+    scored = []
+    for row in rows:
+        e = np.asarray(row["embedding"], dtype=np.float64)
+        similarity = float(e @ q / (np.linalg.norm(e) * np.linalg.norm(q)))
+        if similarity > match_threshold:
+            scored.append({k: v for k, v in row.items() if k != "embedding"} | {"similarity": similarity})
+    scored.sort(key=lambda r: r["similarity"], reverse=True)
+    return scored[:match_count]
+
+
+def check_fixtures() -> None:
+    for corpus, queries in FIXTURE_QUERIES.items():
+        with open(fixture_path(corpus), encoding="utf-8") as f:
+            rows = json.load(f)
+        index = LocalVectorIndex.load(fixture_path(corpus))
+        for query in queries:
+            embedding = hashed_embedding(query)
+            got = index.match(embedding, 0.1, 3)
+            want = reference_match(rows, embedding, 0.1, 3)
+            assert [r["id"] for r in got] == [r["id"] for r in want], (corpus, query, got, want)
+            assert all(abs(a["similarity"] - b["similarity"]) < 1e-5 for a, b in zip(got, want))
+            assert all(set(a) == set(b) for a, b in zip(got, want))
+            top = got[0]["metadata"]["article"] if got else "-"
+            print(f"[{corpus}] {query!r}: {len(got)} matches, top {top}")
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def bench(docs: int, dim: int, queries: int, mmap_dir: str | None) -> dict:
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((docs, dim), dtype=np.float32)
+    records = [{"id": i, "content": f"doc {i}", "metadata": {}} for i in range(docs)]
+    started = time.perf_counter()
+    index = LocalVectorIndex(records, matrix)
+    if mmap_dir:
+        prefix = os.path.join(mmap_dir, "bench_index")
+        index.save(prefix)
+        index = LocalVectorIndex.load(prefix, mmap=True)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    latencies = []
+    for _ in range(queries):
+        query = rng.standard_normal(dim, dtype=np.float32)
+        t0 = time.perf_counter()
+        index.match(query, 0.0, 3)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return {
+        "docs": docs,
+        "dim": dim,
+        "mmap": bool(mmap_dir),
+        "load_ms": round(load_ms, 3),
+        "p50_ms": round(statistics.median(latencies), 4),
+        "p95_ms": round(percentile(latencies, 95), 4),
+        "p99_ms": round(percentile(latencies, 99), 4),
+        "qps": round(queries / (sum(latencies) / 1000), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the local vector index offline")
+    parser.add_argument("--docs", type=int, default=10000, help="Synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=1536, help="Embedding dimension (ada-002 is 1536)")
+    parser.add_argument("--queries", type=int, default=200, help="Number of timed queries")
+    parser.add_argument("--mmap-dir", help="Save the synthetic index here and benchmark it memory-mapped")
+    parser.add_argument("--write-fixture", action="store_true", help="Regenerate the fixture corpora and exit")
+    parser.add_argument("--json", help="Write benchmark results to this file")
+    args = parser.parse_args()
+
+    if args.write_fixture:
+        write_fixtures()
+        return
+
+    check_fixtures()
+    result = bench(args.docs, args.dim, args.queries, args.mmap_dir)
+    print(json.dumps(result, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
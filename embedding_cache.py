@@ -0,0 +1,174 @@
+"""Query-embedding cache for the semantic search tools.
+
+Vectors are kept as float32 NumPy arrays keyed on the normalized query text.
+An optional on-disk store keeps them in a memory-mapped float32 matrix next to
+a small JSON index, so the cache survives restarts.
+"""
+import json
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Sequence
+
+import numpy as np
+
+from cache import TTLCache
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """Canonical cache key for a query: NFKC, case-folded, whitespace collapsed."""
+    text = unicodedata.normalize("NFKC", text)
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+
+class DiskEmbeddingStore:
+    """Fixed-capacity float32 matrix in a memory-mapped file plus a JSON index.
+
+    ``<path>.f32`` holds one vector per slot and ``<path>.json`` maps each key
+    to its slot and creation time. When the store is full the oldest entry's
+    slot is reused.
+    """
+
+    def __init__(self, path: str, capacity: int, ttl: float):
+        self.path = path
+        self.capacity = capacity
+        self.ttl = ttl
+        self.dim: int | None = None
+        self._matrix: np.memmap | None = None
+        self._slots: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        self._dirty = 0
+        self._load()
+
+    @property
+    def _data_path(self) -> str:
+        return f"{self.path}.f32"
+
+    @property
+    def _index_path(self) -> str:
+        return f"{self.path}.json"
+
+    def _load(self) -> None:
+        if not (os.path.exists(self._index_path) and os.path.exists(self._data_path)):
+            return
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        if index.get("capacity") != self.capacity or not index.get("dim"):
+            return
+        self.dim = int(index["dim"])
+        self._matrix = np.memmap(self._data_path, dtype=np.float32, mode="r+", shape=(self.capacity, self.dim))
+        now = time.time()
+        entries = sorted(index.get("entries", {}).items(), key=lambda item: item[1][1])
+        for key, (slot, created_at) in entries:
+            if created_at + self.ttl > now:
+                self._slots[key] = (int(slot), float(created_at))
+
+    def _open(self, dim: int) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.dim = dim
+        self._matrix = np.memmap(self._data_path, dtype=np.float32, mode="w+", shape=(self.capacity, dim))
+        self._slots.clear()
+
+    def get(self, key: str) -> np.ndarray | None:
+        entry = self._slots.get(key)
+        if entry is None or self._matrix is None:
+            return None
+        slot, created_at = entry
+        if created_at + self.ttl <= time.time():
+            del self._slots[key]
+            self._dirty += 1
+            return None
+        return np.array(self._matrix[slot])
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        if self._matrix is None or self.dim != vector.shape[0]:
+            self._open(vector.shape[0])
+        if key in self._slots:
+            slot = self._slots.pop(key)[0]
+        elif len(self._slots) < self.capacity:
+            used = {slot for slot, _ in self._slots.values()}
+            slot = next(i for i in range(self.capacity) if i not in used)
+        else:
+            _, (slot, _) = self._slots.popitem(last=False)
+        self._matrix[slot] = vector
+        self._slots[key] = (slot, time.time())
+        self._dirty += 1
+        if self._dirty >= 32:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the vectors and the index to disk."""
+        if self._matrix is None or not self._dirty:
+            return
+        self._matrix.flush()
+        index = {
+            "capacity": self.capacity,
+            "dim": self.dim,
+            "entries": {key: [slot, created_at] for key, (slot, created_at) in self._slots.items()},
+        }
+        tmp_path = f"{self._index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, self._index_path)
+        self._dirty = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+
+class EmbeddingCache:
+    """LRU + TTL cache of query embeddings, optionally backed by a disk store."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 86400.0, path: str | None = None):
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.disk = DiskEmbeddingStore(path, capacity=maxsize, ttl=ttl) if path else None
+        self.disk_hits = 0
+
+    @classmethod
+    def from_env(cls) -> "EmbeddingCache":
+        return cls(
+            maxsize=int(os.environ.get("EMBEDDING_CACHE_SIZE", 1024)),
+            ttl=float(os.environ.get("EMBEDDING_CACHE_TTL", 86400.0)),
+            path=os.environ.get("EMBEDDING_CACHE_PATH") or None,
+        )
+
+    def get(self, text: str) -> np.ndarray | None:
+        key = normalize_query(text)
+        vector = self.memory.get(key)
+        if vector is None and self.disk is not None:
+            vector = self.disk.get(key)
+            if vector is not None:
+                self.disk_hits += 1
+                self.memory.set(key, vector)
+        return vector
+
+    def put(self, text: str, vector: Sequence[float] | np.ndarray) -> np.ndarray:
+        key = normalize_query(text)
+        vector = np.asarray(vector, dtype=np.float32)
+        self.memory.set(key, vector)
+        if self.disk is not None:
+            self.disk.put(key, vector)
+        return vector
+
+    async def get_or_compute(self, text: str, compute: Callable[[str], Awaitable[Sequence[float]]]) -> np.ndarray:
+        """Return the cached embedding for ``text`` or compute and store it."""
+        vector = self.get(text)
+        if vector is None:
+            vector = self.put(text, await compute(text))
+        return vector
+
+    def flush(self) -> None:
+        if self.disk is not None:
+            self.disk.flush()
+
+    def stats(self) -> dict[str, Any]:
+        stats = self.memory.stats()
+        stats["disk_hits"] = self.disk_hits
+        stats["disk_entries"] = len(self.disk) if self.disk is not None else None
+        return stats
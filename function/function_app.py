@@ -1,12 +1,50 @@
 import azure.functions as func
+import json
 import logging
-import re  # Added for regex
+import os
+
+from chinese_counter import count_chinese, count_utf8_chunks, format_count, select_categories
 
 app = func.FunctionApp(http_auth_level=func.AuthLevel.ANONYMOUS)
 
+# Bytes decoded and counted per step in raw-body mode
+BODY_CHUNK_SIZE = 1 << 20
+RAW_CONTENT_TYPES = ("text/plain", "application/octet-stream")
+# The host hands the function the whole body in memory, so raw bodies are capped
+MAX_BODY_SIZE = int(os.environ.get("CHAR_COUNT_MAX_BODY_SIZE", 16 << 20))
+# Max texts accepted by one batch request
+BATCH_LIMIT = 1000
+
+def counting_options(req: func.HttpRequest) -> dict[str, bool]:
+    """ext_a / ext_b / punctuation query parameters ("true" or "1")."""
+    return {name: req.params.get(name, "").lower() in ("1", "true") for name in ("ext_a", "ext_b", "punctuation")}
+
+def body_too_large(req: func.HttpRequest) -> bool:
+    declared = req.headers.get('Content-Length', '')
+    if declared.isdigit() and int(declared) > MAX_BODY_SIZE:
+        return True
+    return len(req.get_body()) > MAX_BODY_SIZE
+
+def iter_body_chunks(body: bytes):
+    view = memoryview(body)
+    for start in range(0, len(view), BODY_CHUNK_SIZE):
+        yield view[start:start + BODY_CHUNK_SIZE]
+
 @app.route(route="http_trigger")
 def http_trigger(req: func.HttpRequest) -> func.HttpResponse:
     logging.info('Python HTTP trigger function processed a request.')
+    options = counting_options(req)
+
+    # Raw-body POST: count the UTF-8 bytes chunk by chunk instead of parsing JSON
+    content_type = req.headers.get('Content-Type', '').split(';')[0].strip().lower()
+    if req.method == 'POST' and content_type in RAW_CONTENT_TYPES:
+        if body_too_large(req):
+            return func.HttpResponse(f"请求内容过大，最多 {MAX_BODY_SIZE} 字节。", status_code=413)
+        try:
+            counts = count_utf8_chunks(iter_body_chunks(req.get_body()), select_categories(**options))
+        except UnicodeDecodeError:
+            return func.HttpResponse("请求内容不是有效的 UTF-8 文本。", status_code=400)
+        return func.HttpResponse(format_count(sum(counts.values())))
 
     # Retrieve the Chinese string from key "text"
     text = req.params.get('text')
@@ -19,12 +57,32 @@ def http_trigger(req: func.HttpRequest) -> func.HttpResponse:
             text = req_body.get('text')
 
     if text:
-        # Count Chinese characters using regex range \u4e00-\u9fff
-        chinese_chars = re.findall(r'[\u4e00-\u9fff]', text)
-        count = len(chinese_chars)
-        return func.HttpResponse(f"这段中文的字数是: {count}个字")
+        # Count Chinese characters (\u4e00-\u9fff, plus the optional ranges)
+        count = count_chinese(text, **options)
+        return func.HttpResponse(format_count(count))
     else:
         return func.HttpResponse(
              "抱歉，无法计算。",
              status_code=200
-        )
\ No newline at end of file
+        )
+
+@app.route(route="count_batch", methods=["POST"])
+def count_batch(req: func.HttpRequest) -> func.HttpResponse:
+    """Count many texts in one call: {"texts": [...]} -> {"counts": [...], "total": n}."""
+    logging.info('Python HTTP trigger function processed a batch request.')
+    try:
+        req_body = req.get_json()
+    except ValueError:
+        req_body = None
+    texts = req_body.get('texts') if isinstance(req_body, dict) else req_body
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        return func.HttpResponse('Expected a JSON body {"texts": ["...", ...]}.', status_code=400)
+    if len(texts) > BATCH_LIMIT:
+        return func.HttpResponse(f"At most {BATCH_LIMIT} texts per batch.", status_code=400)
+
+    options = counting_options(req)
+    counts = [count_chinese(text, **options) for text in texts]
+    return func.HttpResponse(
+        json.dumps({"counts": counts, "total": sum(counts)}),
+        mimetype="application/json",
+    )
@@ -0,0 +1,215 @@
+"""Shared, lifecycle-managed httpx client pool for outbound tool calls.
+
+One ``httpx.AsyncClient`` is kept per upstream origin (scheme + host + port) so
+that keep-alive connections, DNS results and TLS sessions are reused across
+tool calls instead of being rebuilt for every request.
+"""
+import os
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any, AsyncContextManager, Callable
+from urllib.parse import urlsplit
+
+import httpx
+
+try:  # HTTP/2 needs the optional "h2" package (pip install httpx[http2])
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if not value:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class UpstreamConfig:
+    """Connection limits and timeouts for one upstream origin."""
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 5.0
+    timeout: float = 30.0
+    http2: bool = True
+
+    @classmethod
+    def from_env(cls) -> "UpstreamConfig":
+        """Build the pool-wide defaults from HTTP_POOL_* environment variables."""
+        return cls(
+            max_connections=_env_int("HTTP_POOL_MAX_CONNECTIONS", cls.max_connections),
+            max_keepalive_connections=_env_int("HTTP_POOL_MAX_KEEPALIVE", cls.max_keepalive_connections),
+            keepalive_expiry=_env_float("HTTP_POOL_KEEPALIVE_EXPIRY", cls.keepalive_expiry),
+            connect_timeout=_env_float("HTTP_POOL_CONNECT_TIMEOUT", cls.connect_timeout),
+            timeout=_env_float("HTTP_POOL_TIMEOUT", cls.timeout),
+            http2=_env_bool("HTTP_POOL_HTTP2", cls.http2),
+        )
+
+
+@dataclass
+class UpstreamStats:
+    """Counters for one upstream origin, used to size the pool."""
+    requests: int = 0
+    connections_opened: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    last_used: float = field(default=0.0)
+
+    @property
+    def reused(self) -> int:
+        return max(self.requests - self.connections_opened, 0)
+
+
+def origin_of(url: str) -> str:
+    """Return the scheme://host[:port] part of a URL, used as the pool key."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+class HttpClientPool:
+    """Per-origin pool of long-lived ``httpx.AsyncClient`` instances.
+
+    Clients are created lazily on first use (or eagerly for registered
+    upstreams in :meth:`start`) and closed together in :meth:`aclose`.
+    """
+
+    def __init__(self, defaults: UpstreamConfig | None = None):
+        self.defaults = defaults or UpstreamConfig()
+        # Optional per-request wrapper, e.g. metrics.upstream; called with the upstream name
+        self.instrument: Callable[[str], AsyncContextManager] | None = None
+        self._configs: dict[str, UpstreamConfig] = {}
+        self._names: dict[str, str] = {}
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._stats: dict[str, UpstreamStats] = {}
+        self._started = False
+
+    @classmethod
+    def from_env(cls) -> "HttpClientPool":
+        return cls(UpstreamConfig.from_env())
+
+    def register(self, base_url: str, name: str | None = None, **overrides: Any) -> None:
+        """Set limits/timeouts for an upstream, e.g. ``register(url, "nws", timeout=10.0)``."""
+        origin = origin_of(base_url)
+        self._configs[origin] = replace(self.defaults, **overrides)
+        if name:
+            self._names[origin] = name
+
+    def name_for(self, url: str) -> str:
+        """Upstream name used in metrics: the registered name, else the host."""
+        origin = origin_of(url)
+        return self._names.get(origin) or urlsplit(origin).hostname or origin
+
+    def config_for(self, url: str) -> UpstreamConfig:
+        return self._configs.get(origin_of(url), self.defaults)
+
+    def _build_client(self, origin: str) -> httpx.AsyncClient:
+        config = self._configs.get(origin, self.defaults)
+        limits = httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        )
+        timeout = httpx.Timeout(config.timeout, connect=config.connect_timeout)
+        return httpx.AsyncClient(
+            limits=limits,
+            timeout=timeout,
+            http2=config.http2 and HTTP2_AVAILABLE,
+        )
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """Return the shared client for the URL's origin, creating it if needed."""
+        origin = origin_of(url)
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            client = self._build_client(origin)
+            self._clients[origin] = client
+            self._stats.setdefault(origin, UpstreamStats())
+        return client
+
+    async def start(self) -> None:
+        """Open clients for every registered upstream ahead of the first call."""
+        for origin in self._configs:
+            self.client_for(origin)
+        self._started = True
+
+    async def aclose(self) -> None:
+        """Close all clients and their keep-alive connections."""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+        self._started = False
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a request through the shared client for ``url``'s origin.
+
+        Accepts the same keyword arguments as ``httpx.AsyncClient.request``.
+        """
+        origin = origin_of(url)
+        client = self.client_for(url)
+        stats = self._stats[origin]
+
+        async def trace(event_name: str, info: dict) -> None:
+            # httpcore only emits connect_tcp when a new connection is opened,
+            # so everything else was served from a pooled keep-alive connection.
+            if event_name == "connection.connect_tcp.complete":
+                stats.connections_opened += 1
+
+        extensions = dict(kwargs.pop("extensions", None) or {})
+        extensions.setdefault("trace", trace)
+
+        stats.requests += 1
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        stats.last_used = time.time()
+        try:
+            if self.instrument is None:
+                return await client.request(method, url, extensions=extensions, **kwargs)
+            async with self.instrument(self.name_for(url), method=method) as call:
+                response = await client.request(method, url, extensions=extensions, **kwargs)
+                if response.status_code >= 400:
+                    call.outcome = "http_error"
+                return response
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def stats(self) -> dict[str, Any]:
+        """Pool occupancy and connection reuse counters, per upstream origin."""
+        upstreams = {}
+        for origin, stats in self._stats.items():
+            config = self._configs.get(origin, self.defaults)
+            upstreams[origin] = {
+                "requests": stats.requests,
+                "connections_opened": stats.connections_opened,
+                "connections_reused": stats.reused,
+                "errors": stats.errors,
+                "in_flight": stats.in_flight,
+                "peak_in_flight": stats.peak_in_flight,
+                "max_connections": config.max_connections,
+                "occupancy": stats.in_flight / config.max_connections,
+                "http2": config.http2 and HTTP2_AVAILABLE,
+                "last_used": stats.last_used,
+            }
+        return {"started": self._started, "upstreams": upstreams}
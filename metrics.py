@@ -0,0 +1,239 @@
+"""Prometheus metrics and optional OpenTelemetry spans for tools and upstream calls.
+
+``instrument_tools(mcp)`` wraps every function registered with ``@mcp.tool()``
+afterwards. Each call then records its latency, in-flight count and errors.
+``upstream(name)`` does the same for one outbound call (NWS, Azure prices,
+Supabase, Azure OpenAI, ...). Cache hit rates and admission-control queue
+depths are read from the owners' ``stats()`` on every scrape. If ``opentelemetry`` is installed, tool calls and
+upstream calls also become spans. Without a configured SDK these are no-ops.
+"""
+import contextlib
+import functools
+import time
+from typing import Any, AsyncIterator, Callable
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+try:  # spans are optional: pip install opentelemetry-api (plus an SDK/exporter)
+    from opentelemetry import trace
+    tracer = trace.get_tracer("mcp-server")
+except ImportError:
+    trace = None
+    tracer = None
+
+REGISTRY = CollectorRegistry()
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+TOOL_LATENCY = Histogram(
+    "mcp_tool_duration_seconds", "Tool call latency", ["tool"], buckets=LATENCY_BUCKETS, registry=REGISTRY,
+)
+TOOL_IN_FLIGHT = Gauge("mcp_tool_in_flight", "Tool calls currently running", ["tool"], registry=REGISTRY)
+TOOL_ERRORS = Counter("mcp_tool_errors_total", "Tool calls that raised", ["tool"], registry=REGISTRY)
+
+UPSTREAM_LATENCY = Histogram(
+    "mcp_upstream_duration_seconds", "Outbound call latency by upstream and outcome",
+    ["upstream", "outcome"], buckets=LATENCY_BUCKETS, registry=REGISTRY,
+)
+UPSTREAM_IN_FLIGHT = Gauge("mcp_upstream_in_flight", "Outbound calls currently running", ["upstream"], registry=REGISTRY)
+UPSTREAM_ERRORS = Counter(
+    "mcp_upstream_errors_total", "Outbound calls that failed (exception or HTTP error status)",
+    ["upstream"], registry=REGISTRY,
+)
+
+
+@contextlib.contextmanager
+def _span(name: str, **attributes: Any):
+    if tracer is None:
+        yield None
+        return
+    with tracer.start_as_current_span(name, attributes=attributes) as span:
+        yield span
+
+
+class UpstreamCall:
+    """Handle yielded by :func:`upstream`; set ``outcome`` to classify the call."""
+
+    def __init__(self, span: Any):
+        self.outcome = "ok"
+        self._span = span
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if self._span is not None:
+            self._span.set_attribute(key, value)
+
+
+@contextlib.asynccontextmanager
+async def upstream(name: str, **attributes: Any) -> AsyncIterator[UpstreamCall]:
+    """Time one outbound call to ``name``; exceptions count as errors and are re-raised."""
+    with _span(f"upstream {name}", upstream=name, **attributes) as span:
+        call = UpstreamCall(span)
+        UPSTREAM_IN_FLIGHT.labels(name).inc()
+        started = time.perf_counter()
+        try:
+            yield call
+        except BaseException:
+            call.outcome = "exception"
+            raise
+        finally:
+            UPSTREAM_IN_FLIGHT.labels(name).dec()
+            UPSTREAM_LATENCY.labels(name, call.outcome).observe(time.perf_counter() - started)
+            if call.outcome != "ok":
+                UPSTREAM_ERRORS.labels(name).inc()
+            call.set_attribute("outcome", call.outcome)
+
+
+def instrument_tool(fn: Callable, name: str | None = None) -> Callable:
+    """Wrap an async tool function with latency, in-flight and error metrics."""
+    tool = name or fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with _span(f"tool {tool}", tool=tool):
+            TOOL_IN_FLIGHT.labels(tool).inc()
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            except BaseException:
+                TOOL_ERRORS.labels(tool).inc()
+                raise
+            finally:
+                TOOL_IN_FLIGHT.labels(tool).dec()
+                TOOL_LATENCY.labels(tool).observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+def instrument_tools(mcp: Any) -> None:
+    """Make every later ``@mcp.tool()`` registration record metrics."""
+    register = mcp.tool
+
+    @functools.wraps(register)
+    def tool(*args: Any, **kwargs: Any) -> Callable:
+        decorator = register(*args, **kwargs)
+        name = kwargs.get("name", args[0] if args else None)
+
+        def instrumented(fn: Callable) -> Callable:
+            decorator(instrument_tool(fn, name))
+            # Return the original function, as FastMCP's decorator does
+            return fn
+
+        return instrumented
+
+    mcp.tool = tool
+
+
+class CacheCollector:
+    """Reads hit/miss/size counters from registered caches at scrape time."""
+
+    def __init__(self):
+        self._caches: dict[str, tuple[Callable[[], dict | None], str, str, str, str]] = {}
+
+    def add(self, name: str, stats: Callable[[], dict | None], hits: str = "hits", misses: str = "misses",
+            size: str = "size", stale: str = "stale") -> None:
+        self._caches[name] = (stats, hits, misses, size, stale)
+
+    def collect(self):
+        hits = CounterMetricFamily("mcp_cache_hits", "Cache lookups served from the cache", labels=["cache"])
+        misses = CounterMetricFamily("mcp_cache_misses", "Cache lookups that went upstream", labels=["cache"])
+        ratio = GaugeMetricFamily("mcp_cache_hit_ratio", "Hits / (hits + misses)", labels=["cache"])
+        entries = GaugeMetricFamily("mcp_cache_entries", "Entries currently held", labels=["cache"])
+        stale = CounterMetricFamily("mcp_cache_stale_served", "Stale entries served because the upstream failed", labels=["cache"])
+        for name, (stats_fn, hits_key, misses_key, size_key, stale_key) in self._caches.items():
+            stats = stats_fn()
+            if not stats:
+                continue
+            hit_count, miss_count = stats.get(hits_key) or 0, stats.get(misses_key) or 0
+            hits.add_metric([name], hit_count)
+            misses.add_metric([name], miss_count)
+            ratio.add_metric([name], hit_count / (hit_count + miss_count) if hit_count + miss_count else 0.0)
+            if stats.get(size_key) is not None:
+                entries.add_metric([name], stats[size_key])
+            if stats.get(stale_key) is not None:
+                stale.add_metric([name], stats[stale_key])
+        yield from (hits, misses, ratio, entries, stale)
+
+
+caches = CacheCollector()
+REGISTRY.register(caches)
+
+
+def register_cache(name: str, stats: Callable[[], dict | None], **keys: str) -> None:
+    """Export a cache's ``stats()`` counters, e.g. ``register_cache("nws", cache.stats)``."""
+    caches.add(name, stats, **keys)
+
+
+class AdmissionCollector:
+    """Reads slot usage, queue depth and rejections from the admission controller at scrape time."""
+
+    def __init__(self):
+        self._stats: Callable[[], dict] | None = None
+
+    def collect(self):
+        active = GaugeMetricFamily("mcp_admission_active", "Calls holding a concurrency slot", labels=["limit"])
+        queued = GaugeMetricFamily("mcp_admission_queued", "Calls waiting for a concurrency slot", labels=["limit"])
+        rejected = CounterMetricFamily("mcp_admission_rejected", "Calls rejected by admission control", labels=["limit", "reason"])
+        stats = self._stats() if self._stats else None
+        if stats:
+            limits = {"server": stats["global"], **stats["tools"]}
+            for name, limit in limits.items():
+                active.add_metric([name], limit["active"])
+                queued.add_metric([name], limit["queued"])
+                for reason, count in limit["rejected"].items():
+                    rejected.add_metric([name, reason], count)
+            if stats.get("sessions"):
+                rejected.add_metric(["session", "rate_limited"], stats["sessions"]["limited"])
+        yield from (active, queued, rejected)
+
+
+admission = AdmissionCollector()
+REGISTRY.register(admission)
+
+
+def register_admission(stats: Callable[[], dict]) -> None:
+    """Export an admission controller's ``stats()``."""
+    admission._stats = stats
+
+
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class ResilienceCollector:
+    """Reads circuit breaker states and retry/hedge counts from the upstream client at scrape time."""
+
+    def __init__(self):
+        self._stats: Callable[[], dict] | None = None
+
+    def collect(self):
+        state = GaugeMetricFamily("mcp_upstream_circuit_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)",
+                                  labels=["upstream"])
+        opens = CounterMetricFamily("mcp_upstream_circuit_opens", "Times the circuit breaker opened", labels=["upstream"])
+        rejected = CounterMetricFamily("mcp_upstream_circuit_rejected", "Calls failed fast by an open circuit",
+                                       labels=["upstream"])
+        retries = CounterMetricFamily("mcp_upstream_retries", "Outbound GETs retried after a failure")
+        hedges = CounterMetricFamily("mcp_upstream_hedges", "Hedged requests sent, and how many won", labels=["result"])
+        stats = self._stats() if self._stats else None
+        if stats:
+            for name, breaker in stats["breakers"].items():
+                state.add_metric([name], CIRCUIT_STATES[breaker["state"]])
+                opens.add_metric([name], breaker["opens"])
+                rejected.add_metric([name], breaker["rejected"])
+            retries.add_metric([], stats["retries"])
+            hedges.add_metric(["won"], stats["hedge_wins"])
+            hedges.add_metric(["lost"], stats["hedges"] - stats["hedge_wins"])
+        yield from (state, opens, rejected, retries, hedges)
+
+
+resilience = ResilienceCollector()
+REGISTRY.register(resilience)
+
+
+def register_upstream_client(stats: Callable[[], dict]) -> None:
+    """Export a resilient upstream client's ``stats()``."""
+    resilience._stats = stats
+
+
+def render() -> tuple[bytes, str]:
+    """Prometheus text exposition of all metrics, and its content type."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
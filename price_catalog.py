@@ -0,0 +1,510 @@
+"""Local copy of the Azure retail price catalog with an indexed OData-subset query engine.
+
+The catalog is stored in a directory, one subdirectory per ``serviceName``
+partition:
+
+* ``meta.json`` lists the partitions with their sync times, row counts and
+  subdirectories;
+* each partition's ``meta.json`` holds its string dictionaries, and its
+  ``<column>.npy`` files hold int32 dictionary codes for string columns, or
+  float64 values for numeric columns. These files are memory-mapped on load.
+
+Filters are parsed into a small AST that supports ``eq``, ``contains``,
+``and``, ``or`` and parentheses on armSkuName, armRegionName, serviceName and
+priceType. The AST is evaluated to a row mask from per-column dictionary
+indexes. Anything outside that subset raises :class:`UnsupportedFilter`, and
+the caller falls back to the remote API.
+
+A refresh re-downloads only the stalest partition and rewrites only that
+partition's files, so the catalog is kept current incrementally instead of
+being re-synced in one go.
+"""
+import asyncio
+import contextlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterator
+
+import numpy as np
+
+from azure_prices import PRICE_FIELDS, build_price_url, iter_price_pages
+from resources import run_blocking
+
+try:  # serializes meta.json updates across worker processes; POSIX only
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Response fields kept in the catalog: the displayed fields, the filterable
+# fields and the fields that identify a price row
+STRING_COLUMNS = (
+    "productName", "skuName", "unitOfMeasure", "armRegionName", "armSkuName",
+    "serviceName", "type", "meterId", "skuId", "reservationTerm", "currencyCode",
+)
+FLOAT_COLUMNS = ("retailPrice", "tierMinimumUnits")
+
+# Layout of meta.json; catalogs written with another layout are re-synced
+META_VERSION = 2
+
+# OData filter field (lower case) -> catalog column
+FILTER_FIELDS = {
+    "armskuname": "armSkuName",
+    "armregionname": "armRegionName",
+    "servicename": "serviceName",
+    "pricetype": "type",
+}
+
+
+class UnsupportedFilter(ValueError):
+    """The filter uses OData syntax or fields the local catalog does not evaluate."""
+
+
+###########################
+#####filter parsing
+###########################
+_TOKEN = re.compile(r"\s*(?:(?P<literal>'(?:[^']|'')*')|(?P<word>[A-Za-z_][A-Za-z0-9_]*)|(?P<punct>[(),]))")
+
+
+@dataclass(frozen=True)
+class Compare:
+    op: str  # "eq" or "contains"
+    column: str
+    value: str
+
+
+@dataclass(frozen=True)
+class BoolOp:
+    op: str  # "and" or "or"
+    left: Any
+    right: Any
+
+
+def _tokenize(expression: str) -> list[tuple[str, str]]:
+    tokens, position = [], 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if not match:
+            raise UnsupportedFilter(f"Unexpected input at position {position}: {expression[position:]!r}")
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == "literal":
+            text = text[1:-1].replace("''", "'")
+        tokens.append((kind, text))
+        position = match.end()
+    return tokens
+
+
+def service_filter(service: str) -> str:
+    """Filter selecting one serviceName partition."""
+    escaped = service.replace("'", "''")
+    return f"serviceName eq '{escaped}'"
+
+
+def parse_filter(expression: str) -> Any:
+    """Parse the supported OData subset into ``Compare`` / ``BoolOp`` nodes."""
+    tokens = _tokenize(expression)
+    position = 0
+
+    def peek_word() -> str | None:
+        if position < len(tokens) and tokens[position][0] == "word":
+            return tokens[position][1].lower()
+        return None
+
+    def expect(kind: str, text: str | None = None) -> str:
+        nonlocal position
+        if position >= len(tokens) or tokens[position][0] != kind or (text is not None and tokens[position][1].lower() != text):
+            raise UnsupportedFilter(f"Expected {text or kind} in filter: {expression!r}")
+        position += 1
+        return tokens[position - 1][1]
+
+    def field() -> str:
+        name = expect("word")
+        column = FILTER_FIELDS.get(name.lower())
+        if column is None:
+            raise UnsupportedFilter(f"Field not indexed locally: {name}")
+        return column
+
+    def factor() -> Any:
+        nonlocal position
+        if position < len(tokens) and tokens[position] == ("punct", "("):
+            position += 1
+            node = disjunction()
+            expect("punct", ")")
+            return node
+        if peek_word() == "contains":
+            position += 1
+            expect("punct", "(")
+            column = field()
+            expect("punct", ",")
+            value = expect("literal")
+            expect("punct", ")")
+            return Compare("contains", column, value)
+        column = field()
+        expect("word", "eq")
+        return Compare("eq", column, expect("literal"))
+
+    def conjunction() -> Any:
+        nonlocal position
+        node = factor()
+        while peek_word() == "and":
+            position += 1
+            node = BoolOp("and", node, factor())
+        return node
+
+    def disjunction() -> Any:
+        nonlocal position
+        node = conjunction()
+        while peek_word() == "or":
+            position += 1
+            node = BoolOp("or", node, conjunction())
+        return node
+
+    node = disjunction()
+    if position != len(tokens):
+        raise UnsupportedFilter(f"Unexpected token {tokens[position][1]!r} in filter: {expression!r}")
+    return node
+
+
+###########################
+#####columnar store
+###########################
+class DictionaryColumn:
+    """Dictionary-encoded string column with case-insensitive value and substring lookup."""
+
+    def __init__(self, codes: np.ndarray, values: list[str]):
+        self.codes = codes
+        self.values = values
+        self._lower = [value.lower() for value in values]
+        self._codes_by_value: dict[str, list[int]] = {}
+        for code, value in enumerate(self._lower):
+            self._codes_by_value.setdefault(value, []).append(code)
+        # Row postings per code: rows of code c are order[bounds[c]:bounds[c + 1]]
+        self._order = np.argsort(codes, kind="stable")
+        self._bounds = np.searchsorted(codes[self._order], np.arange(len(values) + 1))
+
+    @classmethod
+    def encode(cls, strings: list[str]) -> "DictionaryColumn":
+        dictionary: dict[str, int] = {}
+        codes = np.fromiter((dictionary.setdefault(s, len(dictionary)) for s in strings), dtype=np.int32, count=len(strings))
+        return cls(codes, list(dictionary))
+
+    def decode(self, rows: np.ndarray | None = None) -> list[str]:
+        codes = self.codes if rows is None else self.codes[rows]
+        return [self.values[code] for code in codes.tolist()]
+
+    def equals(self, value: str) -> np.ndarray:
+        mask = np.zeros(len(self.codes), dtype=bool)
+        for code in self._codes_by_value.get(value.lower(), ()):
+            mask[self._order[self._bounds[code]:self._bounds[code + 1]]] = True
+        return mask
+
+    def contains(self, value: str) -> np.ndarray:
+        needle = value.lower()
+        hits = np.fromiter((needle in candidate for candidate in self._lower), dtype=bool, count=len(self._lower))
+        return hits[self.codes] if len(self._lower) else np.zeros(len(self.codes), dtype=bool)
+
+
+class CatalogPartition:
+    """The rows of one ``serviceName``, stored in their own directory with their own dictionaries."""
+
+    def __init__(self, service: str, columns: dict[str, DictionaryColumn], floats: dict[str, np.ndarray],
+                 synced_at: float, directory: str | None = None):
+        self.service = service
+        self.columns = columns
+        self.floats = floats
+        self.synced_at = synced_at
+        self.directory = directory
+        self.rows = len(next(iter(floats.values()))) if floats else 0
+
+    @classmethod
+    def load(cls, service: str, directory: str, synced_at: float) -> "CatalogPartition":
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        columns = {
+            name: DictionaryColumn(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r"), values)
+            for name, values in meta["dictionaries"].items()
+        }
+        floats = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in FLOAT_COLUMNS}
+        return cls(service, columns, floats, synced_at, directory)
+
+    def save(self, catalog_path: str) -> None:
+        """Write the partition into a new directory of its own; it becomes visible once meta.json names it."""
+        self.directory = tempfile.mkdtemp(prefix="partition-", dir=catalog_path)
+        for name, values in ({name: column.codes for name, column in self.columns.items()} | self.floats).items():
+            np.save(os.path.join(self.directory, f"{name}.npy"), values)
+        with open(os.path.join(self.directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"rows": self.rows, "dictionaries": {name: column.values for name, column in self.columns.items()}},
+                      f, ensure_ascii=False)
+
+    def evaluate(self, node: Any) -> np.ndarray:
+        if isinstance(node, BoolOp):
+            left, right = self.evaluate(node.left), self.evaluate(node.right)
+            return left & right if node.op == "and" else left | right
+        column = self.columns[node.column]
+        return column.equals(node.value) if node.op == "eq" else column.contains(node.value)
+
+    def items(self, rows: np.ndarray) -> list[dict[str, Any]]:
+        fields = {name: self.columns[name].decode(rows) for name in PRICE_FIELDS if name in self.columns}
+        fields.update({name: self.floats[name][rows].tolist() for name in PRICE_FIELDS if name in self.floats})
+        return [{name: fields[name][i] for name in PRICE_FIELDS if name in fields} for i in range(len(rows))]
+
+
+class DownloadBuffer:
+    """Downloaded rows, reduced to dictionary codes for the catalog's columns as pages arrive.
+
+    A full sync covers hundreds of thousands of items; only the stored
+    columns are kept, not the response dicts.
+    """
+
+    def __init__(self):
+        self.dictionaries: dict[str, dict[str, int]] = {name: {} for name in STRING_COLUMNS}
+        self.codes = {name: array("i") for name in STRING_COLUMNS}
+        self.floats = {name: array("d") for name in FLOAT_COLUMNS}
+
+    def extend(self, items: list[dict[str, Any]]) -> None:
+        for item in items:
+            for name in STRING_COLUMNS:
+                dictionary = self.dictionaries[name]
+                self.codes[name].append(dictionary.setdefault(str(item.get(name) or ""), len(dictionary)))
+            for name in FLOAT_COLUMNS:
+                self.floats[name].append(float(item.get(name) or 0.0))
+
+    def partition(self, service: str, synced_at: float, rows: np.ndarray | None = None) -> CatalogPartition:
+        """The given rows (default: all) as a partition with compact dictionaries."""
+        columns = {}
+        for name in STRING_COLUMNS:
+            codes = np.frombuffer(self.codes[name], dtype=np.int32)
+            used, remapped = np.unique(codes if rows is None else codes[rows], return_inverse=True)
+            values = list(self.dictionaries[name])
+            columns[name] = DictionaryColumn(remapped.astype(np.int32), [values[code] for code in used.tolist()])
+        floats = {}
+        for name in FLOAT_COLUMNS:
+            values = np.frombuffer(self.floats[name], dtype=np.float64)
+            floats[name] = values.copy() if rows is None else values[rows]
+        return CatalogPartition(service, columns, floats, synced_at)
+
+    def partitions_by_service(self, synced_at: float) -> list[CatalogPartition]:
+        services = np.frombuffer(self.codes["serviceName"], dtype=np.int32)
+        order = np.argsort(services, kind="stable")
+        bounds = np.searchsorted(services[order], np.arange(len(self.dictionaries["serviceName"]) + 1))
+        return [
+            self.partition(service, synced_at, order[bounds[code]:bounds[code + 1]])
+            for code, service in enumerate(self.dictionaries["serviceName"])
+        ]
+
+
+class PriceCatalog:
+    """Columnar retail price catalog on disk, queried with the OData subset above.
+
+    ``meta.json`` lists the partitions with their sync times and directories.
+    Replacing a partition writes a new directory and then swaps ``meta.json``,
+    so readers never see a half-written catalog, and the other partitions are
+    left untouched. With several worker processes, ``meta.json`` is updated
+    under a file lock and merged with what the other workers wrote.
+    """
+
+    def __init__(self, path: str, services: list[str] | None = None, refresh_interval: float = 86400.0):
+        self.path = path
+        self.services = services or []
+        self.refresh_interval = refresh_interval
+        self.partitions: dict[str, CatalogPartition] = {}
+        self.queries = 0
+        self.unsupported = 0
+        self.last_refresh_error: str | None = None
+        self._refresh_lock = asyncio.Lock()
+
+    @classmethod
+    def from_env(cls) -> "PriceCatalog | None":
+        """Catalog configured by AZURE_PRICE_CATALOG_DIR, or ``None`` when the mode is off."""
+        path = os.environ.get("AZURE_PRICE_CATALOG_DIR")
+        if not path:
+            return None
+        services = [s.strip() for s in os.environ.get("AZURE_PRICE_CATALOG_SERVICES", "").split(",") if s.strip()]
+        return cls(path, services, float(os.environ.get("AZURE_PRICE_CATALOG_REFRESH", 86400.0)))
+
+    @property
+    def rows(self) -> int:
+        return sum(partition.rows for partition in self.partitions.values())
+
+    @property
+    def ready(self) -> bool:
+        return self.rows > 0
+
+    def _read_meta(self) -> dict[str, dict[str, Any]]:
+        meta_path = os.path.join(self.path, "meta.json")
+        if not os.path.exists(meta_path):
+            return {}
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        except ValueError:
+            # Unreadable: treat it as no catalog, so the next full sync replaces it
+            return {}
+        # Catalogs from before partitioned storage have no version; they are re-synced
+        return meta["partitions"] if isinstance(meta, dict) and meta.get("version") == META_VERSION else {}
+
+    def load(self) -> bool:
+        """Memory-map a previously synced catalog; returns False if there is none."""
+        partitions = {
+            service: CatalogPartition.load(service, os.path.join(self.path, entry["dir"]), entry["synced_at"])
+            for service, entry in self._read_meta().items()
+        }
+        self.partitions = partitions
+        return bool(partitions)
+
+    @contextlib.contextmanager
+    def _meta_lock(self) -> Iterator[None]:
+        with open(os.path.join(self.path, ".lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _commit(self, new: list[CatalogPartition], replace_all: bool) -> dict[str, CatalogPartition]:
+        """Persist ``new`` and return the partitions to serve; runs on the blocking pool."""
+        os.makedirs(self.path, exist_ok=True)
+        for partition in new:
+            partition.save(self.path)
+        fresh = {partition.service: partition for partition in new}
+        with self._meta_lock():
+            # Start from the latest meta.json, which another worker may have updated
+            entries = self._read_meta()
+            if replace_all:
+                superseded, entries = entries, {}
+            else:
+                superseded = {service: entry for service, entry in entries.items() if service in fresh}
+            for partition in new:
+                entries[partition.service] = {
+                    "dir": os.path.basename(partition.directory), "synced_at": partition.synced_at, "rows": partition.rows,
+                }
+            fd, tmp_path = tempfile.mkstemp(prefix="meta-", suffix=".json.tmp", dir=self.path)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": META_VERSION, "partitions": entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, os.path.join(self.path, "meta.json"))
+            for entry in superseded.values():
+                # Processes that still map the old files keep them until they let go
+                shutil.rmtree(os.path.join(self.path, entry["dir"]), ignore_errors=True)
+
+        # Our new partitions, unchanged ones as they are, and any another worker replaced since
+        partitions = {}
+        for service, entry in sorted(entries.items()):
+            current = self.partitions.get(service)
+            if service in fresh:
+                partitions[service] = fresh[service]
+            elif current is not None and current.directory and os.path.basename(current.directory) == entry["dir"]:
+                partitions[service] = current
+            else:
+                partitions[service] = CatalogPartition.load(service, os.path.join(self.path, entry["dir"]), entry["synced_at"])
+        return partitions
+
+    ###########################
+    #####queries
+    ###########################
+    def covers(self, node: Any) -> bool:
+        """True if every row the filter can match is inside the synced partitions."""
+        if not self.services:
+            return True  # full catalog
+        if isinstance(node, BoolOp):
+            if node.op == "and":
+                return self.covers(node.left) or self.covers(node.right)
+            return self.covers(node.left) and self.covers(node.right)
+        synced = {service.lower() for service in self.partitions}
+        return node.op == "eq" and node.column == "serviceName" and node.value.lower() in synced
+
+    def query(self, filter_expression: str, limit: int | None = None) -> tuple[list[dict[str, Any]], int]:
+        """Matching items (displayed fields only) and the total number of matches."""
+        try:
+            node = parse_filter(filter_expression)
+            if not self.ready or not self.covers(node):
+                raise UnsupportedFilter("Filter is outside the locally synced services")
+        except UnsupportedFilter:
+            self.unsupported += 1
+            raise
+        self.queries += 1
+        items: list[dict[str, Any]] = []
+        total = 0
+        for partition in list(self.partitions.values()):
+            rows = np.flatnonzero(partition.evaluate(node))
+            total += len(rows)
+            wanted = len(rows) if limit is None else limit - len(items)
+            if wanted > 0:
+                items.extend(partition.items(rows[:wanted]))
+        return items, total
+
+    ###########################
+    #####sync
+    ###########################
+    async def _download(self, base_url: str, fetch_page, filter_expression: str | None) -> DownloadBuffer | None:
+        buffer = DownloadBuffer()
+        async for data, _ in iter_price_pages(build_price_url(base_url, filter_expression), fetch_page):
+            if data is None:
+                return None
+            buffer.extend(data.get("Items") or [])
+        return buffer
+
+    def _targets(self, now: float) -> list[str | None]:
+        """Services to sync now; ``None`` stands for the whole catalog."""
+        if self.services:
+            # Services a failed earlier sync never got are retried before anything is refreshed
+            missing = [service for service in self.services if service not in self.partitions]
+            if missing:
+                return missing
+        elif not self.ready:
+            return [None]
+        if not self.partitions:
+            return []
+        service, partition = min(self.partitions.items(), key=lambda item: item[1].synced_at)
+        return [service] if now - partition.synced_at >= self.refresh_interval else []
+
+    async def refresh(self, base_url: str, fetch_page: Callable[[str], Awaitable[dict[str, Any] | None]]) -> bool:
+        """Sync the catalog once: a full download if empty, else missing or the stalest stale partition."""
+        async with self._refresh_lock:
+            now = time.time()
+            targets = self._targets(now)
+            if not targets:
+                return False
+            for service in targets:
+                buffer = await self._download(base_url, fetch_page, None if service is None else service_filter(service))
+                if buffer is None:
+                    self.last_refresh_error = f"Download failed for {service or 'full catalog'}"
+                    return False
+                # Encoding and writing the partition happen off the event loop
+                if service is None:
+                    self.partitions = await run_blocking(
+                        lambda: self._commit(buffer.partitions_by_service(now), replace_all=True)
+                    )
+                else:
+                    self.partitions = await run_blocking(
+                        lambda: self._commit([buffer.partition(service, now)], replace_all=False)
+                    )
+            self.last_refresh_error = None
+            return True
+
+    async def run_refresh_loop(self, base_url: str, fetch_page, poll_interval: float = 60.0) -> None:
+        """Background task: keep refreshing stale partitions until cancelled."""
+        while True:
+            try:
+                await self.refresh(base_url, fetch_page)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_refresh_error = str(e)
+            await asyncio.sleep(poll_interval)
+
+    def stats(self) -> dict[str, Any]:
+        oldest = min((partition.synced_at for partition in self.partitions.values()), default=None)
+        return {
+            "path": self.path,
+            "rows": self.rows,
+            "partitions": len(self.partitions),
+            "oldest_partition_age": time.time() - oldest if oldest else None,
+            "queries": self.queries,
+            "unsupported_filters": self.unsupported,
+            "last_refresh_error": self.last_refresh_error,
+        }
@@ -0,0 +1,104 @@
+"""Process-wide registry of expensive clients and a bounded pool for blocking calls.
+
+SDK clients such as the Supabase client or the Azure OpenAI embedding model are
+built once on first use and then shared by every tool call. Their synchronous
+methods are run on a bounded thread pool so they never block the event loop
+that serves the SSE sessions.
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+BLOCKING_POOL_SIZE = int(os.environ.get("BLOCKING_POOL_SIZE", 8))
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the shared executor used for blocking SDK calls."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=BLOCKING_POOL_SIZE, thread_name_prefix="mcp-blocking")
+        return _executor
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking callable on the bounded thread pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(fn, *args, **kwargs))
+
+
+def shutdown_executor() -> None:
+    """Stop the blocking pool; a new one is created on the next call."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class ResourceRegistry:
+    """Lazily built, shared resources keyed by name.
+
+    Factories are registered up front and only called on first use, so a
+    deployment that never calls a tool never pays for its clients. Each name
+    has its own build lock, so a slow build never holds up the others and a
+    factory may itself ``get`` another resource.
+    """
+
+    def __init__(self):
+        self._factories: dict[str, Callable[[], Any]] = {}
+        self._resources: dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._build_locks: dict[str, threading.Lock] = {}
+
+    def _build_lock(self, name: str) -> threading.Lock:
+        with self._lock:
+            return self._build_locks.setdefault(name, threading.Lock())
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        self._factories[name] = factory
+        self._resources.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        """Return the resource, building it on the calling thread if needed."""
+        resource = self._resources.get(name)
+        if resource is not None:
+            return resource
+        with self._build_lock(name):
+            if name not in self._resources:
+                self._resources[name] = self._factories[name]()
+            return self._resources[name]
+
+    async def aget(self, name: str) -> Any:
+        """Return the resource, building it on the blocking pool if needed."""
+        resource = self._resources.get(name)
+        if resource is not None:
+            return resource
+        return await run_blocking(self.get, name)
+
+    def peek(self, name: str) -> Any:
+        """Return the resource if it has already been built, without building it."""
+        return self._resources.get(name)
+
+    def reset(self, name: str | None = None) -> None:
+        """Drop a built resource (or all of them) so it is rebuilt on next use."""
+        with self._lock:
+            if name is None:
+                self._resources.clear()
+            else:
+                self._resources.pop(name, None)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "registered": sorted(self._factories),
+            "built": sorted(self._resources),
+            "blocking_pool_size": BLOCKING_POOL_SIZE,
+        }
@@ -0,0 +1,47 @@
+"""Objects shared by the server and every tool group.
+
+``mcp-server.py`` cannot be imported by name (it contains a hyphen), so the
+FastMCP instance and the process-wide clients live here, where the modules in
+``tool_groups`` can import them. Nothing in this module imports a heavy SDK.
+"""
+from dotenv import load_dotenv
+from mcp.server.fastmcp import FastMCP
+
+import metrics
+from admission import AdmissionController, guard_tools
+from http_pool import HttpClientPool
+from resources import ResourceRegistry
+from single_flight import SingleFlight
+from upstream import ResilientClient
+
+# 加载环境变量
+load_dotenv()
+
+USER_AGENT = "weather-app/1.0"
+
+# Initialize FastMCP server
+mcp = FastMCP("haxu-mcp-server")
+# Record latency, in-flight count and errors for every tool registered below
+metrics.instrument_tools(mcp)
+# Bound concurrent tool calls (MCP_MAX_CONCURRENCY, MCP_TOOL_CONCURRENCY) and rate limit sessions
+admission = AdmissionController.from_env()
+guard_tools(mcp, admission)
+metrics.register_admission(admission.stats)
+
+# Shared outbound HTTP clients, opened on startup and closed on shutdown
+http_pool = HttpClientPool.from_env()
+http_pool.instrument = metrics.upstream
+# Retries, optional hedging and per-upstream circuit breakers (UPSTREAM_* settings)
+upstream_client = ResilientClient.from_env(http_pool)
+metrics.register_upstream_client(upstream_client.stats)
+
+# Shared SDK clients (Supabase, Azure OpenAI), built once on first use
+resources = ResourceRegistry()
+
+# Identical concurrent upstream calls share one request (results are shared; don't mutate them)
+flights: dict[str, SingleFlight] = {}
+
+
+def single_flight(name: str) -> SingleFlight:
+    """The named coalescing group, reported under ``single_flight`` in ``/stats``."""
+    return flights.setdefault(name, SingleFlight())
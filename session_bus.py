@@ -0,0 +1,361 @@
+"""Cross-worker message routing for the SSE transport.
+
+``SseServerTransport`` keeps each session's stream in process memory. A POST
+to ``/messages/`` therefore has to reach the worker that holds the SSE
+connection. ``RoutedSseServerTransport`` lifts that restriction:
+
+* When a worker opens an SSE session, it subscribes to that session on a
+  :class:`SessionBus`.
+* A POST for a session that another worker holds is published on the bus.
+* The owning worker replays the POST into its local transport, so the session
+  sees exactly the request the client sent.
+
+``InMemorySessionBus`` is the single-process default. ``RedisSessionBus`` uses
+Redis pub/sub. Any server that speaks the Redis protocol can stand in for it
+(Valkey, KeyDB, Dragonfly, or fakeredis in tests).
+
+Forwarded messages for a session are replayed one at a time, in the order the
+bus delivered them, so a notification never overtakes the request before it.
+"""
+import abc
+import asyncio
+import base64
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable
+from urllib.parse import parse_qs
+from uuid import UUID
+
+from mcp import types
+from mcp.server.sse import SseServerTransport
+from pydantic import ValidationError
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[bytes], Awaitable[None]]
+
+# Same limit the base transport applies to POST bodies
+MAX_FORWARDED_BODY = 4 * 1024 * 1024
+
+_background: set[asyncio.Task] = set()
+
+
+def _spawn(coro: Awaitable[Any]) -> asyncio.Task:
+    """Start a fire-and-forget task and keep a reference until it finishes."""
+    task = asyncio.ensure_future(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    return task
+
+
+class SessionBus(abc.ABC):
+    """Delivers payloads to whichever worker subscribed to a session.
+
+    Handlers are awaited in delivery order; they should hand the payload off
+    quickly rather than do the work inline.
+    """
+
+    # Whether other workers publish to this bus; if not, an unknown session is simply gone
+    shared = True
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @abc.abstractmethod
+    async def subscribe(self, session: str, handler: Handler) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def unsubscribe(self, session: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def publish(self, session: str, payload: bytes) -> int:
+        """Send ``payload`` to the session's subscriber; returns the number of receivers."""
+
+    def stats(self) -> dict[str, Any]:
+        return {"backend": type(self).__name__}
+
+
+class InMemorySessionBus(SessionBus):
+    """Process-local bus; enough for a single worker."""
+
+    shared = False
+
+    def __init__(self):
+        self._handlers: dict[str, Handler] = {}
+
+    async def subscribe(self, session: str, handler: Handler) -> None:
+        self._handlers[session] = handler
+
+    async def unsubscribe(self, session: str) -> None:
+        self._handlers.pop(session, None)
+
+    async def publish(self, session: str, payload: bytes) -> int:
+        handler = self._handlers.get(session)
+        if handler is None:
+            return 0
+        await handler(payload)
+        return 1
+
+    def stats(self) -> dict[str, Any]:
+        return {"backend": "memory", "sessions": len(self._handlers)}
+
+
+class RedisSessionBus(SessionBus):
+    """Redis pub/sub bus: one channel per session, one subscriber connection per worker.
+
+    If the subscriber connection drops, the reader logs it, waits (doubling the
+    delay up to ``RECONNECT_MAX_DELAY``) and resubscribes every live session.
+    """
+
+    RECONNECT_MIN_DELAY = 0.5
+    RECONNECT_MAX_DELAY = 30.0
+
+    def __init__(self, url: str | None = None, client: Any = None, prefix: str = "mcp:session:"):
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError as e:  # optional dependency
+                raise ImportError("RedisSessionBus needs the redis package: pip install redis") from e
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self._handlers: dict[str, Handler] = {}
+        self._pubsub = None
+        self._reader: asyncio.Task | None = None
+        self.published = 0
+        self.delivered = 0
+        self.reconnects = 0
+
+    async def start(self) -> None:
+        await self._connect()
+        self._reader = asyncio.create_task(self._read())
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        await self.client.aclose()
+
+    async def _connect(self) -> None:
+        """Open a fresh subscriber connection and subscribe to every live session."""
+        previous, self._pubsub = self._pubsub, self.client.pubsub(ignore_subscribe_messages=True)
+        if previous is not None:
+            try:
+                await previous.aclose()
+            except Exception:  # already broken; nothing left to release
+                pass
+        # redis-py's listener stops when nothing is subscribed; keep one channel open
+        await self._pubsub.subscribe(f"{self.prefix}_worker", *(self.prefix + session for session in self._handlers))
+
+    async def _read(self) -> None:
+        delay = self.RECONNECT_MIN_DELAY
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    delay = self.RECONNECT_MIN_DELAY
+                    await self._dispatch(message)
+                raise ConnectionError("subscriber connection closed")
+            except Exception as e:
+                logger.warning("Session bus subscriber failed (%s: %s); reconnecting in %.1fs", type(e).__name__, e, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.RECONNECT_MAX_DELAY)
+            try:
+                await self._connect()
+            except Exception as e:
+                # The next listen() fails too and backs off further
+                logger.warning("Session bus reconnect failed: %s: %s", type(e).__name__, e)
+            else:
+                self.reconnects += 1
+                logger.info("Session bus reconnected; resubscribed %d sessions", len(self._handlers))
+
+    async def _dispatch(self, message: dict) -> None:
+        channel = message["channel"]
+        channel = channel.decode() if isinstance(channel, bytes) else channel
+        handler = self._handlers.get(channel[len(self.prefix):])
+        if handler is None:
+            return
+        self.delivered += 1
+        try:
+            await handler(message["data"])
+        except Exception:
+            logger.exception("Session bus handler for %s failed", channel)
+
+    async def subscribe(self, session: str, handler: Handler) -> None:
+        self._handlers[session] = handler
+        try:
+            await self._pubsub.subscribe(self.prefix + session)
+        except Exception as e:
+            # The reader resubscribes every registered session once it reconnects
+            logger.warning("Could not subscribe to session %s yet: %s: %s", session, type(e).__name__, e)
+
+    async def unsubscribe(self, session: str) -> None:
+        self._handlers.pop(session, None)
+        await self._pubsub.unsubscribe(self.prefix + session)
+
+    async def publish(self, session: str, payload: bytes) -> int:
+        self.published += 1
+        return await self.client.publish(self.prefix + session, payload)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "backend": "redis", "sessions": len(self._handlers), "published": self.published,
+            "delivered": self.delivered, "reconnects": self.reconnects,
+        }
+
+
+def create_session_bus(url: str | None = None) -> SessionBus:
+    """Bus for ``url`` (``SESSION_BUS_URL``): ``redis://...`` / ``rediss://...``, else in-memory."""
+    url = url if url is not None else os.environ.get("SESSION_BUS_URL", "")
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSessionBus(url)
+    if url and url != "memory://":
+        raise ValueError(f"Unsupported SESSION_BUS_URL: {url}")
+    return InMemorySessionBus()
+
+
+class _SessionTable(dict):
+    """The transport's session -> stream map, with callbacks on add and remove."""
+
+    def __init__(self, on_add: Callable[[UUID], None], on_remove: Callable[[UUID], None]):
+        super().__init__()
+        self._on_add = on_add
+        self._on_remove = on_remove
+
+    def __setitem__(self, session_id: UUID, writer: Any) -> None:
+        super().__setitem__(session_id, writer)
+        self._on_add(session_id)
+
+    def pop(self, session_id: UUID, *default: Any) -> Any:
+        present = session_id in self
+        value = super().pop(session_id, *default)
+        if present:
+            self._on_remove(session_id)
+        return value
+
+    def __delitem__(self, session_id: UUID) -> None:
+        super().__delitem__(session_id)
+        self._on_remove(session_id)
+
+
+class RoutedSseServerTransport(SseServerTransport):
+    """SSE transport whose message endpoint works on any worker sharing the bus."""
+
+    # A POST can race the owner's subscription right after the endpoint event
+    PUBLISH_RETRIES = 5
+    PUBLISH_RETRY_DELAY = 0.05
+
+    def __init__(self, endpoint: str, bus: SessionBus, **kwargs: Any):
+        super().__init__(endpoint, **kwargs)
+        self.bus = bus
+        self._read_stream_writers = _SessionTable(self._session_opened, self._session_closed)
+        self._subscriptions: dict[UUID, asyncio.Task] = {}
+        # One replay task per session drains its forwarded messages in order
+        self._replayers: dict[UUID, asyncio.Task] = {}
+        self.forwarded = 0
+        self.received = 0
+
+    def _session_opened(self, session_id: UUID) -> None:
+        inbox: asyncio.Queue[bytes] = asyncio.Queue()
+
+        async def deliver(payload: bytes) -> None:
+            self.received += 1
+            inbox.put_nowait(payload)
+
+        self._replayers[session_id] = _spawn(self._replay_in_order(session_id, inbox))
+        self._subscriptions[session_id] = _spawn(self.bus.subscribe(session_id.hex, deliver))
+
+    def _session_closed(self, session_id: UUID) -> None:
+        replayer = self._replayers.pop(session_id, None)
+        if replayer is not None:
+            replayer.cancel()
+        subscribing = self._subscriptions.pop(session_id, None)
+
+        async def unsubscribe() -> None:
+            if subscribing is not None:
+                await asyncio.gather(subscribing, return_exceptions=True)
+            await self.bus.unsubscribe(session_id.hex)
+
+        _spawn(unsubscribe())
+
+    async def _replay_in_order(self, session_id: UUID, inbox: "asyncio.Queue[bytes]") -> None:
+        while True:
+            payload = await inbox.get()
+            try:
+                await self._replay(payload)
+            except Exception:
+                logger.exception("Could not replay a forwarded message for session %s", session_id.hex)
+
+    async def _replay(self, payload: bytes) -> None:
+        """Run a forwarded POST through the local transport as if it arrived here."""
+        message = json.loads(payload)
+        body = base64.b64decode(message["body"])
+        scope = {
+            "type": "http", "method": "POST", "http_version": "1.1", "scheme": "http",
+            "path": message["path"], "raw_path": message["path"].encode(), "root_path": "",
+            "query_string": message["query_string"].encode(),
+            "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in message["headers"]],
+            "client": None, "server": None,
+        }
+        sent = False
+
+        async def receive() -> dict:
+            nonlocal sent
+            if sent:
+                return {"type": "http.disconnect"}
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(_: dict) -> None:
+            # The client already got its response from the worker that forwarded the POST
+            pass
+
+        await super().handle_post_message(scope, receive, send)
+
+    async def handle_post_message(self, scope: Scope, receive: Receive, send: Send) -> None:
+        session_hex = parse_qs(scope.get("query_string", b"").decode()).get("session_id", [""])[0]
+        try:
+            local = UUID(hex=session_hex) in self._read_stream_writers
+        except ValueError:
+            local = True  # let the base transport answer the bad request
+        if scope["method"] != "POST" or local or not self.bus.shared:
+            return await super().handle_post_message(scope, receive, send)
+
+        request = Request(scope, receive)
+        body = await request.body()
+        if len(body) > MAX_FORWARDED_BODY:
+            return await Response("Request body too large", status_code=413)(scope, receive, send)
+        try:
+            types.JSONRPCMessage.model_validate_json(body)
+        except ValidationError:
+            return await Response("Could not parse message", status_code=400)(scope, receive, send)
+
+        payload = json.dumps({
+            "path": scope["path"],
+            "query_string": scope.get("query_string", b"").decode(),
+            "headers": [(name.decode("latin-1"), value.decode("latin-1")) for name, value in scope["headers"]],
+            "body": base64.b64encode(body).decode(),
+        }).encode()
+        for attempt in range(self.PUBLISH_RETRIES):
+            if await self.bus.publish(session_hex, payload):
+                self.forwarded += 1
+                return await Response("Accepted", status_code=202)(scope, receive, send)
+            await asyncio.sleep(self.PUBLISH_RETRY_DELAY * (attempt + 1))
+        return await Response("Could not find session", status_code=404)(scope, receive, send)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "local_sessions": len(self._read_stream_writers),
+            "forwarded": self.forwarded,
+            "received": self.received,
+            "bus": self.bus.stats(),
+        }
@@ -0,0 +1,70 @@
+"""Request coalescing: identical concurrent calls share one upstream call.
+
+``await flight.do(key, fn)`` runs ``fn()`` only if no call for ``key`` is in
+progress. Otherwise it waits for the one that is. Every waiter gets the same
+result object, or the same exception, so callers must not mutate the result.
+
+The shared call runs as its own task. Cancelling one waiter does not cancel
+it for the others. Once every waiter has gone, it is cancelled so no upstream
+work is left running for nobody. Nothing is cached: a key is forgotten as soon
+as its call finishes, so caching stays with the caches in front of this layer.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one."""
+
+    def __init__(self):
+        self._calls: dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = _Call(asyncio.ensure_future(fn()))
+            call.task.add_done_callback(lambda task: self._finished(key, call))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Later callers start a fresh call rather than join the cancelled one
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                call.task.cancel()
+
+    def _finished(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.task.cancelled():
+            # Mark the exception as retrieved even when every waiter was cancelled
+            call.task.exception()
+
+    def stats(self) -> dict[str, Any]:
+        total = self.calls + self.coalesced
+        return {
+            "in_flight": len(self._calls),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": self.coalesced / total if total else 0.0,
+        }
@@ -0,0 +1,87 @@
+import asyncio
+import operator
+import os
+import sys
+from typing import Annotated, TypedDict
+
+import pytest
+
+pytest.importorskip("langgraph")
+from langgraph.graph import END, StateGraph  # noqa: E402
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agent"))
+from sample_agent.checkpointer import BoundedMemorySaver  # noqa: E402
+
+
+class State(TypedDict):
+    turns: Annotated[list, operator.add]
+
+
+def build_graph(checkpointer):
+    """A chat_node that runs a nested two-step graph, like the react agent in the sample agent."""
+    inner = StateGraph(State)
+    inner.add_node("think", lambda state: {"turns": ["think"]})
+    inner.add_node("answer", lambda state: {"turns": ["answer"]})
+    inner.set_entry_point("think")
+    inner.add_edge("think", "answer")
+    inner.add_edge("answer", END)
+    agent = inner.compile()
+
+    async def chat_node(state, config):
+        result = await agent.ainvoke({"turns": []}, config)
+        return {"turns": result["turns"]}
+
+    outer = StateGraph(State)
+    outer.add_node("chat_node", chat_node)
+    outer.set_entry_point("chat_node")
+    outer.add_edge("chat_node", END)
+    return outer.compile(checkpointer)
+
+
+def test_checkpoints_stay_bounded_across_turns():
+    saver = BoundedMemorySaver(keep_checkpoints=4)
+    graph = build_graph(saver)
+    config = {"configurable": {"thread_id": "t"}}
+
+    async def chat(turns):
+        sizes = []
+        for _ in range(turns):
+            await graph.ainvoke({"turns": ["user"]}, config)
+            sizes.append(saver.stats())
+        return sizes
+
+    sizes = asyncio.run(chat(30))
+    # Only the root namespace survives a finished turn
+    assert list(saver.storage["t"]) == [""]
+    assert sizes[-1]["checkpoints"] == 4
+    assert sizes[-1] == sizes[10]
+    assert max(size["checkpoints"] for size in sizes) <= 4
+    assert all(key[1] == "" for key in saver.blobs)
+    assert all(key[1] == "" for key in saver.writes)
+    # The conversation itself is intact
+    state = graph.get_state(config)
+    assert state.values["turns"] == ["user", "think", "answer"] * 30
+
+
+def test_sqlite_checkpoints_stay_bounded_across_turns(tmp_path):
+    pytest.importorskip("langgraph.checkpoint.sqlite")
+    from sample_agent.checkpointer import BoundedSqliteSaver
+
+    async def chat(turns):
+        saver = BoundedSqliteSaver.from_path(str(tmp_path / "checkpoints.sqlite"), keep_checkpoints=4)
+        graph = build_graph(saver)
+        config = {"configurable": {"thread_id": "t"}}
+        for _ in range(turns):
+            await graph.ainvoke({"turns": ["user"]}, config)
+        async with saver.conn.execute("SELECT checkpoint_ns, COUNT(*) FROM checkpoints GROUP BY checkpoint_ns") as cursor:
+            counts = dict(await cursor.fetchall())
+        async with saver.conn.execute("SELECT COUNT(*) FROM writes WHERE checkpoint_ns != ''") as cursor:
+            (subgraph_writes,) = await cursor.fetchone()
+        state = await graph.aget_state(config)
+        await saver.conn.close()
+        return counts, subgraph_writes, state.values["turns"]
+
+    counts, subgraph_writes, turns = asyncio.run(chat(30))
+    assert counts == {"": 4}
+    assert subgraph_writes == 0
+    assert turns == ["user", "think", "answer"] * 30
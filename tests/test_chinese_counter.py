@@ -0,0 +1,38 @@
+import pytest
+
+from function import chinese_counter
+from function.chinese_counter import NUMPY_MIN_LENGTH, count_by_category, count_chinese, count_utf8_chunks
+
+TEXT = "中华人民共和国刑法，第一条。abc \U00020000㐀"
+
+
+@pytest.mark.parametrize("repeat", [1, NUMPY_MIN_LENGTH])
+def test_numpy_and_regex_paths_agree(repeat):
+    text = TEXT * repeat
+    assert count_by_category(text, ("basic", "ext_a", "ext_b", "punctuation")) == {
+        "basic": 12 * repeat, "ext_a": 1 * repeat, "ext_b": 1 * repeat, "punctuation": 2 * repeat,
+    }
+
+
+@pytest.mark.parametrize("length", [10, NUMPY_MIN_LENGTH + 10])
+def test_lone_surrogates_are_skipped_on_both_paths(length):
+    text = ("中\ud800" * length)[:length]
+    assert count_chinese(text) == (length + 1) // 2
+
+
+def test_regex_fallback_without_numpy(monkeypatch):
+    monkeypatch.setattr(chinese_counter, "np", None)
+    assert count_chinese(TEXT * NUMPY_MIN_LENGTH, ext_a=True) == 13 * NUMPY_MIN_LENGTH
+
+
+def test_utf8_sequences_split_across_chunks():
+    data = TEXT.encode("utf-8") * 3
+    expected = count_by_category(TEXT * 3, ("basic", "ext_b"))
+    for size in (1, 2, 3, 5, 7):
+        chunks = [data[i:i + size] for i in range(0, len(data), size)]
+        assert count_utf8_chunks(chunks, ("basic", "ext_b")) == expected
+
+
+def test_truncated_utf8_is_rejected():
+    with pytest.raises(UnicodeDecodeError):
+        count_utf8_chunks(["中".encode("utf-8")[:2]])
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+func = pytest.importorskip("azure.functions")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "function"))
+import function_app  # noqa: E402
+
+
+def raw_request(body, headers=None):
+    headers = {"Content-Type": "text/plain; charset=utf-8", **(headers or {})}
+    return func.HttpRequest(method="POST", url="/api/http_trigger", headers=headers, body=body)
+
+
+def call(req):
+    # The route decorator returns a FunctionBuilder; build() gives back the handler
+    return function_app.http_trigger.build().get_user_function()(req)
+
+
+def test_raw_body_is_counted():
+    response = call(raw_request("你好，世界".encode("utf-8")))
+    assert response.status_code == 200
+    assert response.get_body().decode("utf-8") == "这段中文的字数是: 4个字"
+
+
+def test_raw_body_over_the_limit_is_rejected(monkeypatch):
+    monkeypatch.setattr(function_app, "MAX_BODY_SIZE", 8)
+    assert call(raw_request("你好，世界".encode("utf-8"))).status_code == 413
+    # A declared length over the limit is rejected before the body is read
+    assert call(raw_request(b"", {"Content-Length": "9"})).status_code == 413
@@ -0,0 +1,55 @@
+import pytest
+
+from law_index import CriminalLawIndex, decode_cursor, encode_cursor
+
+
+@pytest.fixture(scope="module")
+def index():
+    return CriminalLawIndex()
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(None) == 0
+    assert decode_cursor("") == 0
+    assert decode_cursor(encode_cursor(42)) == 42
+    assert decode_cursor(encode_cursor(42), limit=42) == 42
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "!!!", encode_cursor(-1)])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+def test_cursor_past_the_end_is_rejected():
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(encode_cursor(10000), limit=499)
+
+
+def test_pages_cover_every_article_once(index):
+    seen, cursor = [], None
+    while True:
+        articles, start, cursor = index.page(cursor, 100)
+        assert start == len(seen)
+        seen.extend(articles)
+        if cursor is None:
+            break
+    assert seen == list(index.contents)
+
+
+def test_page_rejects_out_of_range_cursor(index):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        index.page(encode_cursor(len(index.contents) + 1), 20)
+
+
+@pytest.mark.parametrize("query", ["", "\n", " ", "  ", "\t", " 罪 ", "第一条\n"])
+def test_search_by_content_matches_library_on_whitespace(index, query):
+    from law_index import law
+
+    def outcome(search):
+        try:
+            return "result", search(query)
+        except Exception as e:
+            return type(e).__name__, str(e)
+
+    assert outcome(index.search_by_content) == outcome(law.getInfoByContent)
@@ -0,0 +1,14 @@
+import asyncio
+
+import pytest
+from mcp.server.fastmcp import Context
+
+from tool_groups import legal
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_law_articles_outside_a_request_return_one_page(stream):
+    # No request context means no progress token, so even stream=True returns a page
+    text = asyncio.run(legal.get_law_articles(Context(), page_size=2, stream=stream))
+    assert text.startswith("Articles 1-2 of ")
+    assert "Next cursor: " in text
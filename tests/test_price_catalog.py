@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from azure_prices import normalize_filter
+from price_catalog import BoolOp, Compare, PriceCatalog, UnsupportedFilter, parse_filter
+
+BASE_URL = "https://prices.test/api/retail/prices"
+
+
+def item(service, sku, region="eastus", price=1.0):
+    return {"serviceName": service, "armSkuName": sku, "skuName": sku, "productName": f"{service} {sku}",
+            "armRegionName": region, "retailPrice": price, "unitOfMeasure": "1 Hour", "type": "Consumption"}
+
+
+CATALOG = [
+    item("Virtual Machines", "Standard_D2_v3", price=0.1),
+    item("Virtual Machines", "Standard_D4_v3", "westeurope", price=0.2),
+    item("Storage", "Hot_LRS", price=0.02),
+    item("SQL Database", "GP_Gen5_2", price=0.5),
+]
+
+
+class FakePriceApi:
+    """Serves CATALOG one item per page; a service in ``failing`` makes its first page fail."""
+
+    def __init__(self, catalog=CATALOG, failing=()):
+        self.catalog = list(catalog)
+        self.failing = set(failing)
+        self.requests = []
+
+    async def __call__(self, url):
+        query = parse_qs(urlsplit(url).query)
+        self.requests.append(query.get("$filter", [None])[0])
+        node = parse_filter(query["$filter"][0]) if "$filter" in query else None
+        service = node.value if node is not None else None
+        if service in self.failing:
+            return None
+        items = [row for row in self.catalog if service is None or row["serviceName"] == service]
+        page = int(query.get("page", ["0"])[0])
+        next_link = f"{url.split('&page=')[0]}&page={page + 1}" if page + 1 < len(items) else None
+        return {"Items": items[page:page + 1], "NextPageLink": next_link}
+
+
+def sync(catalog, api):
+    return asyncio.run(catalog.refresh(BASE_URL, api))
+
+
+###########################
+#####filter parsing
+###########################
+def test_parses_the_supported_subset():
+    node = parse_filter("(contains(armSkuName, 'D2') or armSkuName eq 'x') AND armRegionName eq 'eastus'")
+    assert node == BoolOp(
+        "and",
+        BoolOp("or", Compare("contains", "armSkuName", "D2"), Compare("eq", "armSkuName", "x")),
+        Compare("eq", "armRegionName", "eastus"),
+    )
+
+
+def test_and_binds_tighter_than_or():
+    node = parse_filter("serviceName eq 'a' or serviceName eq 'b' and priceType eq 'Consumption'")
+    assert node.op == "or" and node.right.op == "and"
+
+
+def test_quotes_are_unescaped():
+    assert parse_filter("armSkuName eq 'O''Neil'").value == "O'Neil"
+
+
+@pytest.mark.parametrize("expression", [
+    "retailPrice gt 1",
+    "meterName eq 'x'",
+    "armSkuName eq 'x' and",
+    "startswith(armSkuName, 'x')",
+    "(armSkuName eq 'x'",
+    "armSkuName eq 'x' armRegionName eq 'y'",
+])
+def test_rejects_everything_else(expression):
+    with pytest.raises(UnsupportedFilter):
+        parse_filter(expression)
+
+
+def test_normalize_filter_collapses_whitespace_outside_literals():
+    assert normalize_filter("  contains( armSkuName ,  'D2  v3' )   and\tarmRegionName eq 'eastus' ") == \
+        "contains(armSkuName,'D2  v3')and armRegionName eq 'eastus'"
+    assert normalize_filter("armSkuName eq 'a ( b'") == "armSkuName eq 'a ( b'"
+
+
+###########################
+#####catalog
+###########################
+def test_full_sync_answers_queries_and_survives_reload(tmp_path):
+    catalog = PriceCatalog(str(tmp_path))
+    assert sync(catalog, FakePriceApi())
+    items, total = catalog.query("contains(armSkuName, 'd2') or serviceName eq 'storage'")
+    assert total == 2
+    assert sorted(row["skuName"] for row in items) == ["Hot_LRS", "Standard_D2_v3"]
+    assert set(items[0]) <= {"productName", "skuName", "retailPrice", "unitOfMeasure", "armRegionName"}
+
+    reloaded = PriceCatalog(str(tmp_path))
+    assert reloaded.load()
+    assert reloaded.rows == 4
+    assert reloaded.query("serviceName eq 'SQL Database'")[0][0]["retailPrice"] == 0.5
+
+
+def test_limit_keeps_the_total(tmp_path):
+    catalog = PriceCatalog(str(tmp_path))
+    sync(catalog, FakePriceApi())
+    items, total = catalog.query("armRegionName eq 'eastus'", limit=1)
+    assert len(items) == 1 and total == 3
+
+
+def test_incremental_refresh_rewrites_only_the_stale_partition(tmp_path):
+    catalog = PriceCatalog(str(tmp_path), services=["Virtual Machines", "Storage"], refresh_interval=0)
+    sync(catalog, FakePriceApi())
+    with open(tmp_path / "meta.json", encoding="utf-8") as f:
+        before = json.load(f)["partitions"]
+    catalog.partitions["Storage"].synced_at -= 10  # now the stalest
+
+    api = FakePriceApi(CATALOG + [item("Storage", "Cool_LRS")])
+    assert sync(catalog, api)
+    assert api.requests == ["serviceName eq 'Storage'"] * 2
+    with open(tmp_path / "meta.json", encoding="utf-8") as f:
+        after = json.load(f)["partitions"]
+    assert after["Virtual Machines"]["dir"] == before["Virtual Machines"]["dir"]
+    assert after["Storage"]["dir"] != before["Storage"]["dir"]
+    assert not os.path.exists(tmp_path / before["Storage"]["dir"])
+    assert catalog.query("serviceName eq 'Storage'")[1] == 2
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_services_missing_after_a_failed_sync_are_retried(tmp_path):
+    catalog = PriceCatalog(str(tmp_path), services=["Virtual Machines", "Storage"])
+    assert not sync(catalog, FakePriceApi(failing={"Storage"}))
+    assert set(catalog.partitions) == {"Virtual Machines"}
+    with pytest.raises(UnsupportedFilter):
+        catalog.query("serviceName eq 'Storage'")
+
+    api = FakePriceApi()
+    assert sync(catalog, api)
+    assert api.requests == ["serviceName eq 'Storage'"]
+    assert catalog.query("serviceName eq 'Storage'")[1] == 1
+
+
+def test_workers_merge_their_partitions(tmp_path):
+    # Two catalogs over one directory stand in for two worker processes
+    first = PriceCatalog(str(tmp_path), services=["Virtual Machines", "Storage"], refresh_interval=0)
+    sync(first, FakePriceApi())
+    second = PriceCatalog(str(tmp_path), services=["Virtual Machines", "Storage"], refresh_interval=0)
+    second.load()
+
+    first.partitions["Storage"].synced_at -= 10
+    sync(first, FakePriceApi(CATALOG + [item("Storage", "Cool_LRS")]))
+    second.partitions["Virtual Machines"].synced_at -= 10
+    sync(second, FakePriceApi(CATALOG + [item("Virtual Machines", "Standard_E2_v3")]))
+
+    reloaded = PriceCatalog(str(tmp_path), services=["Virtual Machines", "Storage"])
+    reloaded.load()
+    assert reloaded.query("serviceName eq 'Storage'")[1] == 2
+    assert reloaded.query("serviceName eq 'Virtual Machines'")[1] == 3
+    assert second.query("serviceName eq 'Storage'")[1] == 2
+
+
+def test_unreadable_meta_is_replaced_by_a_full_sync(tmp_path):
+    (tmp_path / "meta.json").write_text('{"version": 2, "partit', encoding="utf-8")
+    catalog = PriceCatalog(str(tmp_path))
+    assert not catalog.load()
+    assert sync(catalog, FakePriceApi())
+    assert PriceCatalog(str(tmp_path)).load()
+
+
+def test_startup_survives_a_damaged_catalog(tmp_path, monkeypatch, caplog):
+    from tool_groups import pricing
+
+    sync(PriceCatalog(str(tmp_path)), FakePriceApi())
+    partition = next(path for path in tmp_path.iterdir() if path.name.startswith("partition-"))
+    os.remove(partition / "retailPrice.npy")
+    catalog = PriceCatalog(str(tmp_path))
+    monkeypatch.setattr(pricing, "price_catalog", catalog)
+    monkeypatch.setattr(pricing, "make_azure_price_request", FakePriceApi())
+
+    async def scenario():
+        await pricing.startup()
+        # Not loaded, so the tool goes to the live API
+        with pytest.raises(UnsupportedFilter):
+            catalog.query("serviceName eq 'Storage'")
+        # The refresh loop re-syncs it in the background
+        for _ in range(100):
+            if catalog.ready:
+                break
+            await asyncio.sleep(0.01)
+        await pricing.shutdown()
+
+    with caplog.at_level("WARNING", logger="tool_groups.pricing"):
+        asyncio.run(scenario())
+    assert "Could not load the Azure price catalog" in caplog.text
+    assert catalog.query("serviceName eq 'Storage'")[1] == 1
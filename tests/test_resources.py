@@ -0,0 +1,34 @@
+import threading
+import time
+
+from resources import ResourceRegistry
+
+
+def test_builds_once_and_shares():
+    calls = []
+    registry = ResourceRegistry()
+    registry.register("client", lambda: calls.append(1) or object())
+    assert registry.get("client") is registry.get("client")
+    assert len(calls) == 1
+
+
+def test_slow_build_does_not_block_other_resources():
+    started, release = threading.Event(), threading.Event()
+    registry = ResourceRegistry()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "slow"
+
+    registry.register("slow", slow)
+    registry.register("fast", lambda: "fast")
+    thread = threading.Thread(target=registry.get, args=("slow",))
+    thread.start()
+    started.wait(5)
+    began = time.monotonic()
+    assert registry.get("fast") == "fast"
+    assert time.monotonic() - began < 1.0
+    release.set()
+    thread.join()
+    assert registry.peek("slow") == "slow"
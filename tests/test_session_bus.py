@@ -0,0 +1,155 @@
+import asyncio
+import time
+import uuid
+
+import fakeredis
+import pytest
+import redis
+
+from session_bus import InMemorySessionBus, RedisSessionBus, RoutedSseServerTransport, SessionBus
+
+
+async def wait_until(condition, timeout=5.0):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+
+def test_session_bus_is_abstract():
+    with pytest.raises(TypeError):
+        SessionBus()
+
+    class Partial(SessionBus):
+        async def subscribe(self, session, handler):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_forwarded_messages_replay_in_order():
+    async def scenario():
+        bus = RedisSessionBus(client=fakeredis.aioredis.FakeRedis())
+        await bus.start()
+        transport = RoutedSseServerTransport("/messages/", bus)
+        replayed = []
+
+        async def replay(payload):
+            # Earlier messages take longer, so concurrent replays would finish out of order
+            number = int(payload)
+            await asyncio.sleep(0.01 * (5 - number))
+            replayed.append(number)
+
+        transport._replay = replay
+        session = uuid.uuid4()
+        transport._read_stream_writers[session] = object()
+        await wait_until(lambda: session.hex in bus._handlers)
+        for number in range(5):
+            assert await bus.publish(session.hex, str(number).encode()) == 1
+        await wait_until(lambda: len(replayed) == 5)
+        del transport._read_stream_writers[session]
+        await bus.close()
+        return replayed, transport.received
+
+    replayed, received = asyncio.run(scenario())
+    assert replayed == [0, 1, 2, 3, 4]
+    assert received == 5
+
+
+def test_in_memory_bus_replays_in_order():
+    async def scenario():
+        transport = RoutedSseServerTransport("/messages/", InMemorySessionBus())
+        replayed = []
+
+        async def replay(payload):
+            await asyncio.sleep(0.01 * (3 - int(payload)))
+            replayed.append(int(payload))
+
+        transport._replay = replay
+        session = uuid.uuid4()
+        transport._read_stream_writers[session] = object()
+        await wait_until(lambda: transport.bus.stats()["sessions"] == 1)
+        for number in range(3):
+            await transport.bus.publish(session.hex, str(number).encode())
+        await wait_until(lambda: len(replayed) == 3)
+        transport._read_stream_writers.pop(session)
+        return replayed
+
+    assert asyncio.run(scenario()) == [0, 1, 2]
+
+
+class DroppingPubSub:
+    """A subscriber whose connection drops as soon as it is read."""
+
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+
+    def __getattr__(self, name):
+        return getattr(self._pubsub, name)
+
+    async def listen(self):
+        raise redis.ConnectionError("Connection reset by peer")
+        yield
+
+
+def test_redis_bus_reconnects_and_resubscribes(caplog):
+    async def scenario():
+        client = fakeredis.aioredis.FakeRedis()
+        pubsub = client.pubsub
+        opened = []
+
+        def flaky_pubsub(**kwargs):
+            opened.append(None)
+            real = pubsub(**kwargs)
+            return DroppingPubSub(real) if len(opened) == 1 else real
+
+        client.pubsub = flaky_pubsub
+        bus = RedisSessionBus(client=client)
+        bus.RECONNECT_MIN_DELAY = 0.01
+        received = []
+
+        async def handler(payload):
+            received.append(payload)
+
+        await bus.start()
+        await bus.subscribe("abc", handler)
+        await wait_until(lambda: bus.reconnects == 1)
+        # fakeredis keeps the dropped connection subscribed too; only the live one is read
+        assert await bus.publish("abc", b"after the drop") >= 1
+        await wait_until(lambda: received)
+        stats = bus.stats()
+        await bus.close()
+        return received, stats
+
+    with caplog.at_level("WARNING", logger="session_bus"):
+        received, stats = asyncio.run(scenario())
+    assert received == [b"after the drop"]
+    assert stats["reconnects"] == 1
+    assert "reconnecting" in caplog.text
+
+
+def test_unknown_session_on_a_local_bus_is_404_without_retries():
+    async def scenario():
+        transport = RoutedSseServerTransport("/messages/", InMemorySessionBus())
+        scope = {
+            "type": "http", "method": "POST", "path": "/messages/", "root_path": "",
+            "query_string": f"session_id={uuid.uuid4().hex}".encode(),
+            "headers": [(b"content-type", b"application/json")],
+        }
+        body = b'{"jsonrpc": "2.0", "id": 1, "method": "ping"}'
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        started = time.perf_counter()
+        await transport.handle_post_message(scope, receive, send)
+        return sent[0]["status"], time.perf_counter() - started
+
+    status, elapsed = asyncio.run(scenario())
+    assert status == 404
+    assert elapsed < RoutedSseServerTransport.PUBLISH_RETRY_DELAY
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+class Upstream:
+    """Counts calls and blocks each one until ``release`` is set."""
+
+    def __init__(self):
+        self.started = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.started += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return {"call": self.started}
+
+
+def test_cancelled_waiter_leaves_the_call_running_for_others():
+    async def scenario():
+        flight, upstream = SingleFlight(), Upstream()
+        first = asyncio.ensure_future(flight.do("key", upstream))
+        second = asyncio.ensure_future(flight.do("key", upstream))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        upstream.release.set()
+        result = await second
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return flight, upstream, result
+
+    flight, upstream, result = asyncio.run(scenario())
+    assert result == {"call": 1}
+    assert upstream.started == 1
+    assert upstream.cancelled == 0
+    assert flight.stats()["coalesced"] == 1
+    assert len(flight) == 0
+
+
+def test_last_waiter_leaving_cancels_the_call():
+    async def scenario():
+        flight, upstream = SingleFlight(), Upstream()
+        waiters = [asyncio.ensure_future(flight.do("key", upstream)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+        return flight, upstream
+
+    flight, upstream = asyncio.run(scenario())
+    assert upstream.started == 1
+    assert upstream.cancelled == 1
+    assert len(flight) == 0
+
+
+def test_call_after_cancellation_starts_fresh():
+    async def scenario():
+        flight, upstream = SingleFlight(), Upstream()
+        abandoned = asyncio.ensure_future(flight.do("key", upstream))
+        await asyncio.sleep(0)
+        abandoned.cancel()
+        # Start the next call before the cancelled one has finished unwinding
+        fresh = asyncio.ensure_future(flight.do("key", upstream))
+        await asyncio.sleep(0)
+        upstream.release.set()
+        return flight, upstream, await fresh
+
+    flight, upstream, result = asyncio.run(scenario())
+    assert result == {"call": 2}
+    assert upstream.started == 2
+    assert upstream.cancelled == 1
+    assert flight.stats()["calls"] == 2
+
+
+def test_exception_reaches_every_waiter():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+
+        async def failing():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream failed")
+
+        results = await asyncio.gather(*(flight.do("key", failing) for _ in range(3)), return_exceptions=True)
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert all(isinstance(result, ValueError) for result in results)
+    # Every waiter sees the same exception object
+    assert results[0] is results[1] is results[2]
+    assert len(flight) == 0
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from upstream import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def open_breaker(clock, threshold=3):
+    breaker = CircuitBreaker("upstream", failure_threshold=threshold, reset_timeout=10.0, clock=clock)
+    for _ in range(threshold):
+        breaker.before_call()
+        breaker.record_failure()
+    return breaker
+
+
+def test_opens_after_consecutive_failures():
+    clock = FakeClock()
+    breaker = CircuitBreaker("upstream", failure_threshold=3, reset_timeout=10.0, clock=clock)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    # A success resets the count, so failures must be consecutive
+    breaker.record_success()
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.opens == 1
+
+
+def test_open_breaker_rejects_calls():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+    clock.now = 4.0
+    with pytest.raises(CircuitOpen) as raised:
+        breaker.before_call()
+    assert raised.value.upstream == "upstream"
+    assert raised.value.retry_after == pytest.approx(6.0)
+    assert breaker.rejected == 1
+
+
+def test_half_open_allows_a_single_probe():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+    clock.now = 10.0
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0
+    breaker.before_call()
+
+
+def test_failed_probe_reopens():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+    clock.now = 10.0
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.opens == 2
+    # The reset timeout starts again from the failed probe
+    clock.now = 19.0
+    assert breaker.state == OPEN
+    clock.now = 20.0
+    assert breaker.state == HALF_OPEN
+
+
+def test_release_frees_the_probe():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+    clock.now = 10.0
+    breaker.before_call()
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()
+
+
+def test_guard_records_the_outcome():
+    async def scenario():
+        clock = FakeClock()
+        breaker = CircuitBreaker("upstream", failure_threshold=1, reset_timeout=10.0, clock=clock)
+        with pytest.raises(RuntimeError):
+            async with breaker.guard():
+                raise RuntimeError("boom")
+        assert breaker.state == OPEN
+        clock.now = 10.0
+        # Cancellation is not a verdict: the probe is released, the breaker stays half-open
+        with pytest.raises(asyncio.CancelledError):
+            async with breaker.guard():
+                raise asyncio.CancelledError
+        assert breaker.state == HALF_OPEN
+        async with breaker.guard():
+            pass
+        return breaker.stats()
+
+    assert asyncio.run(scenario()) == {"state": CLOSED, "failures": 0, "opens": 1, "rejected": 0}
@@ -0,0 +1,26 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+from tool_groups import utility
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_loading_the_group_does_not_import_numpy():
+    # A fresh interpreter, so modules imported by other tests don't count
+    code = (
+        "import sys, tool_groups; tool_groups.load_groups(['utility']); "
+        "print('numpy' in sys.modules, 'function.chinese_counter' in sys.modules)"
+    )
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True, cwd=ROOT).stdout
+    assert output.split() == ["False", "False"]
+
+
+def test_count_after_warmup():
+    async def scenario():
+        await utility.warmup()
+        return await utility.count_chinese_characters("你好，世界", punctuation=True)
+
+    assert asyncio.run(scenario()) == "Chinese character count: 这段中文的字数是: 5个字"
@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+from vector_index import LocalVectorIndex
+
+
+def test_empty_corpus_builds_an_index_that_matches_nothing(tmp_path):
+    index = LocalVectorIndex.from_records([])
+    assert len(index) == 0
+    assert index.match([0.1, 0.2, 0.3], match_threshold=0.0, match_count=5) == []
+    assert index.similarities([0.1, 0.2, 0.3]).shape == (0,)
+
+    fixture = tmp_path / "empty.json"
+    fixture.write_text(json.dumps([]), encoding="utf-8")
+    assert len(LocalVectorIndex.load(str(fixture))) == 0
+
+    index.save(str(tmp_path / "saved"))
+    reloaded = LocalVectorIndex.load(str(tmp_path / "saved"))
+    assert reloaded.match([1.0], match_threshold=0.0, match_count=1) == []
+
+
+def test_match_orders_by_similarity_above_threshold():
+    index = LocalVectorIndex.from_records([
+        {"id": 1, "embedding": [1.0, 0.0]},
+        {"id": 2, "embedding": "[0.6, 0.8]"},
+        {"id": 3, "embedding": [0.0, 1.0]},
+    ])
+    assert index.dim == 2
+    matches = index.match([0.0, 1.0], match_threshold=0.5, match_count=5)
+    assert [row["id"] for row in matches] == [3, 2]
+    assert matches[1]["similarity"] == pytest.approx(0.8)
@@ -0,0 +1,41 @@
+import asyncio
+
+from runtime import resources
+from tool_groups import vector_search
+
+ROWS = [{"id": 1, "content": "erasure", "embedding": [1.0, 0.0]}, {"id": 2, "content": "breach", "embedding": [0.0, 1.0]}]
+
+
+class FakeSupabase:
+    """Just enough of the Supabase query builder for LocalVectorIndex.from_supabase."""
+
+    def table(self, name):
+        return self
+
+    def select(self, columns):
+        return self
+
+    def order(self, column):
+        return self
+
+    def range(self, start, end):
+        self.data = ROWS[start:end + 1]
+        return self
+
+    def execute(self):
+        return self
+
+
+def test_local_index_downloads_through_the_shared_supabase_client(monkeypatch):
+    # The index factory gets "supabase" from inside the registry's own get()
+    monkeypatch.delenv("GDPR_INDEX_PATH", raising=False)
+    resources.register("supabase", FakeSupabase)
+    resources.reset("index:match_documents")
+
+    async def build():
+        return await asyncio.wait_for(resources.aget("index:match_documents"), timeout=5)
+
+    index = asyncio.run(build())
+    assert [row["id"] for row in index.match([1.0, 0.1], 0.5, 3)] == [1]
+    resources.register("supabase", vector_search.create_supabase_client)
+    resources.reset()
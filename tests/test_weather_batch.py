@@ -0,0 +1,38 @@
+import asyncio
+
+from tool_groups import weather
+
+FORECAST = {"properties": {"periods": [{"name": "Tonight", "temperature": 60, "temperatureUnit": "F", "windSpeed": "5 mph",
+                                        "windDirection": "N", "detailedForecast": "Clear."}]}}
+
+
+def fake_nws(responses):
+    async def make_nws_request(url, cached=True):
+        for fragment, response in responses.items():
+            if fragment in url:
+                return response
+        return None
+    return make_nws_request
+
+
+def test_malformed_member_does_not_fail_the_forecast_batch(monkeypatch):
+    monkeypatch.setattr(weather, "grid_cache", weather.GridPointCache())
+    monkeypatch.setattr(weather, "make_nws_request", fake_nws({
+        "/points/1.0,1.0": {"properties": {"forecast": "https://nws.test/good/forecast"}},
+        "/points/2.0,2.0": {"unexpected": {}},
+        "/good/forecast": FORECAST,
+    }))
+    result = asyncio.run(weather.get_forecast_batch([{"latitude": 1, "longitude": 1}, {"latitude": 2, "longitude": 2}]))
+    good, bad = result.split("\n\n## ")
+    assert "Tonight" in good
+    assert bad.startswith("2.0, 2.0\nError fetching forecast: KeyError")
+
+
+def test_malformed_member_does_not_fail_the_alerts_batch(monkeypatch):
+    monkeypatch.setattr(weather, "make_nws_request", fake_nws({
+        "/area/CA": {"features": [{"properties": {"event": "Heat Advisory"}}]},
+        "/area/NY": {"features": [{"no_properties": True}]},
+    }))
+    result = asyncio.run(weather.get_alerts_batch(["CA", "NY"]))
+    assert "Heat Advisory" in result
+    assert "## NY\nError fetching alerts: KeyError" in result
@@ -0,0 +1,39 @@
+import asyncio
+import json
+
+from weather_cache import GridPointCache
+
+PROPERTIES = {"forecast": "https://api.weather.gov/gridpoints/TOP/31,80/forecast", "gridId": "TOP", "gridX": 31, "gridY": 80}
+
+
+def test_put_is_written_by_persist_not_by_put(tmp_path):
+    path = tmp_path / "grids.json"
+    cache = GridPointCache(str(path))
+    cache.put(39.74561, -97.08921, PROPERTIES)
+    assert not path.exists()
+    asyncio.run(cache.persist())
+    assert list(json.loads(path.read_text())) == ["39.7456,-97.0892"]
+    assert GridPointCache(str(path)).get(39.7456, -97.0892)["gridId"] == "TOP"
+
+
+def test_least_recently_used_location_is_evicted(tmp_path):
+    cache = GridPointCache(maxsize=2)
+    cache.put(1, 1, PROPERTIES)
+    cache.put(2, 2, PROPERTIES)
+    assert cache.get(1, 1) is not None
+    cache.put(3, 3, PROPERTIES)
+    assert cache.get(2, 2) is None
+    assert cache.get(1, 1) is not None and cache.get(3, 3) is not None
+
+
+def test_write_failure_is_logged_and_retried(tmp_path, caplog):
+    path = tmp_path / "missing-dir" / "grids.json"
+    cache = GridPointCache(str(path))
+    assert cache.put(1, 1, PROPERTIES)["gridId"] == "TOP"
+    cache.flush()
+    assert cache.stats()["write_errors"] == 1
+    assert "Could not write the NWS grid cache" in caplog.text
+
+    (tmp_path / "missing-dir").mkdir()
+    cache.flush()
+    assert path.exists()
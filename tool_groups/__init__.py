@@ -0,0 +1,102 @@
+"""Tool groups, loaded as plugins.
+
+Each module in this package registers its tools with ``runtime.mcp`` when it
+is imported, so a group that is not enabled costs nothing: neither its module
+nor the SDKs behind it are ever imported. ``MCP_TOOL_GROUPS`` (or ``--tools``)
+picks the groups, e.g. ``legal,weather``. ``all`` (the default) enables every
+group, and ``none`` leaves only ``/stats`` and ``/metrics``.
+
+A group module may define:
+
+* ``startup()`` / ``shutdown()``: coroutines run by the app's lifespan.
+* ``warmup()``: a coroutine started in the background once the server is up.
+  It imports heavy dependencies or builds indexes ahead of the first call, so
+  they no longer delay startup (off with ``MCP_WARMUP=0``). A call that
+  arrives first simply builds what it needs itself.
+* ``stats()``: entries merged into ``/stats``.
+"""
+import asyncio
+import importlib
+import logging
+import os
+import time
+from types import ModuleType
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+TOOL_GROUPS = ("legal", "weather", "pricing", "vector_search", "utility")
+
+# Group -> seconds its module took to import, and how its warm-up went, for /stats
+import_seconds: dict[str, float] = {}
+warmup_state: dict[str, str] = {}
+
+
+def parse_groups(value: str) -> list[str]:
+    """``"legal, weather"`` -> ``["legal", "weather"]``; ``all`` or empty means every group."""
+    names = [name.strip().lower().replace("-", "_") for name in value.split(",") if name.strip()]
+    if not names or names == ["all"]:
+        return list(TOOL_GROUPS)
+    if names == ["none"]:
+        return []
+    unknown = sorted(set(names) - set(TOOL_GROUPS))
+    if unknown:
+        raise ValueError(f"Unknown tool groups: {', '.join(unknown)} (choose from {', '.join(TOOL_GROUPS)}, all or none)")
+    return [group for group in TOOL_GROUPS if group in names]
+
+
+def load_groups(groups: list[str] | None = None) -> dict[str, ModuleType]:
+    """Import the given groups (default: ``MCP_TOOL_GROUPS``), registering their tools."""
+    if groups is None:
+        groups = parse_groups(os.environ.get("MCP_TOOL_GROUPS", "all"))
+    modules = {}
+    for group in groups:
+        started = time.perf_counter()
+        modules[group] = importlib.import_module(f"{__name__}.{group}")
+        import_seconds.setdefault(group, time.perf_counter() - started)
+    return modules
+
+
+async def startup(groups: dict[str, ModuleType]) -> None:
+    for module in groups.values():
+        if hasattr(module, "startup"):
+            await module.startup()
+
+
+async def shutdown(groups: dict[str, ModuleType]) -> None:
+    for module in reversed(list(groups.values())):
+        if hasattr(module, "shutdown"):
+            await module.shutdown()
+
+
+async def _warm(group: str, module: ModuleType) -> None:
+    started = time.perf_counter()
+    warmup_state[group] = "running"
+    try:
+        await module.warmup()
+    except Exception as e:
+        # Not fatal: the first call that needs it will try again and report the error
+        warmup_state[group] = "failed"
+        logger.warning("Warm-up of the %s tools failed: %s", group, e)
+    else:
+        warmup_state[group] = "done"
+        logger.info("%s tools warmed up in %.2fs", group, time.perf_counter() - started)
+
+
+def start_warmups(groups: dict[str, ModuleType]) -> list[asyncio.Task]:
+    """Start every group's ``warmup()`` in the background; the caller cancels them on shutdown."""
+    return [asyncio.create_task(_warm(group, module)) for group, module in groups.items() if hasattr(module, "warmup")]
+
+
+def stats(groups: dict[str, ModuleType]) -> dict[str, Any]:
+    """Every group's ``stats()`` entries, plus which groups are loaded and their import times."""
+    merged: dict[str, Any] = {
+        "tool_groups": {
+            group: {"import_seconds": round(import_seconds.get(group, 0.0), 4), "warmup": warmup_state.get(group)}
+            for group in groups
+        },
+    }
+    for module in groups.values():
+        if hasattr(module, "stats"):
+            merged.update(module.stats())
+    return merged
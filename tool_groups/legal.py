@@ -0,0 +1,163 @@
+"""Chinese Criminal Law tools, served from a prebuilt :class:`law_index.CriminalLawIndex`.
+
+``legal_documents_cn`` pulls in pandas and nltk, so ``law_index`` is imported
+by the index factory rather than at module level. ``warmup()`` builds the
+index in the background once the server is up.
+"""
+import logging
+import os
+
+from mcp.server.fastmcp import Context
+
+from runtime import mcp, resources
+
+logger = logging.getLogger(__name__)
+
+
+def create_law_index():
+    from law_index import CriminalLawIndex
+    return CriminalLawIndex()
+
+# Inverted indexes over the Criminal Law text, built once on first use or by warmup()
+resources.register("criminal_law_index", create_law_index)
+
+# Page size limits for get_law_articles
+LAW_PAGE_SIZE = int(os.environ.get("LAW_PAGE_SIZE", 20))
+LAW_MAX_PAGE_SIZE = int(os.environ.get("LAW_MAX_PAGE_SIZE", 100))
+
+@mcp.tool()
+async def get_article_by_code(article_code: int, sub_article_code: int = None) -> str:
+    """Get information by article code from Chinese Criminal Law.
+
+    Args:
+        article_code: The main article code (e.g., 219)
+        sub_article_code: The sub-article code (e.g., 1)
+    """
+    try:
+        index = await resources.aget("criminal_law_index")
+        result = index.get_article(article_code, sub_article_code)
+        return result if result else "No article found with the specified code."
+    except Exception as e:
+        return f"Error retrieving article information: {str(e)}"
+
+@mcp.tool()
+async def search_by_content(content: str, vague: bool = True) -> str:
+    """Search for legal articles by content in Chinese Criminal Law.
+    
+    Args:
+        content: The content to search for (e.g., '交通肇事')
+        vague: Whether to use fuzzy search (default: True)
+    """
+    try:
+        index = await resources.aget("criminal_law_index")
+        results = index.search_by_content(content, vague)
+        if not results or len(results) == 0:
+            return "No articles found matching the content."
+        
+        if isinstance(results, list):
+            return "\n\n---\n\n".join(results)
+        return results
+    except Exception as e:
+        return f"Error searching for content: {str(e)}"
+
+@mcp.tool()
+async def get_by_article_name(article_name: str) -> str:
+    """Get legal information by article name/cause of action.
+    
+    Args:
+        article_name: The name of the article or cause of action (e.g., '交通肇事罪')
+    """
+    try:
+        index = await resources.aget("criminal_law_index")
+        result = index.get_by_article_name(article_name)
+        return result if result else "No information found for the specified article name."
+    except Exception as e:
+        return f"Error retrieving information by article name: {str(e)}"
+
+@mcp.tool()
+async def get_specific_article(article_code: int, paragraph_code: int) -> str:
+    """Get a specific paragraph from an article in Chinese Criminal Law.
+    
+    Args:
+        article_code: The article code (e.g., 73)
+        paragraph_code: The paragraph code (e.g., 3)
+    """
+    try:
+        index = await resources.aget("criminal_law_index")
+        result = index.get_article(article_code, paragraph_code)
+        return result if result else "No specific paragraph found for the given article and paragraph code."
+    except Exception as e:
+        return f"Error retrieving specific article paragraph: {str(e)}"
+
+@mcp.tool()
+async def get_all_law_contents() -> str:
+    """Get all contents of the Chinese Criminal Law.
+    
+    Returns a list of all legal provisions.
+    """
+    try:
+        index = await resources.aget("criminal_law_index")
+        return index.all_contents_response
+    except Exception as e:
+        return f"Error retrieving all law contents: {str(e)}"
+
+def format_law_page(articles: list[str], start: int, total: int, next_cursor: str | None) -> str:
+    """Format one page of articles with its position and the cursor for the next page."""
+    header = f"Articles {start + 1}-{start + len(articles)} of {total}"
+    footer = f"Next cursor: {next_cursor}" if next_cursor else "End of Criminal Law text."
+    return "\n\n---\n\n".join([header, *articles, footer])
+
+def progress_token(ctx: Context):
+    """The caller's progress token; None if it sent none or there is no request."""
+    try:
+        meta = ctx.request_context.meta
+    except ValueError:  # called outside a request
+        return None
+    return meta.progressToken if meta is not None else None
+
+
+@mcp.tool()
+async def get_law_articles(ctx: Context, cursor: str = None, page_size: int = None, stream: bool = False) -> str:
+    """Read the full text of the Chinese Criminal Law page by page.
+
+    Args:
+        cursor: Opaque cursor from a previous call (omit to start at the first article)
+        page_size: Articles per page (default 20, max 100)
+        stream: Send every remaining page as a progress notification instead of returning one page
+    """
+    try:
+        index = await resources.aget("criminal_law_index")
+        page_size = max(1, min(page_size or LAW_PAGE_SIZE, LAW_MAX_PAGE_SIZE))
+        total = len(index.contents)
+        articles, start, next_cursor = index.page(cursor, page_size)
+
+        if not stream or progress_token(ctx) is None:
+            return format_law_page(articles, start, total, next_cursor)
+
+        # Stream one page per progress notification so the client gets the first
+        # articles immediately and only a single page is held in memory at a time
+        first, pages = start, 0
+        while True:
+            pages += 1
+            await ctx.report_progress(
+                start + len(articles),
+                total,
+                message=format_law_page(articles, start, total, next_cursor),
+            )
+            if next_cursor is None:
+                break
+            articles, start, next_cursor = index.page(next_cursor, page_size)
+        return f"Streamed articles {first + 1}-{total} of {total} in {pages} progress notifications."
+    except Exception as e:
+        return f"Error retrieving law articles: {str(e)}"
+
+
+async def warmup() -> None:
+    """Build the Criminal Law indexes and lookup table before the first query arrives."""
+    law_index = await resources.aget("criminal_law_index")
+    logger.info("Criminal Law index ready: %s", law_index.stats())
+
+
+def stats() -> dict:
+    law_index = resources.peek("criminal_law_index")
+    return {"criminal_law_index": law_index.stats() if law_index else None}
@@ -0,0 +1,146 @@
+"""Azure retail price lookup, answered from the cache, the local catalog or the Azure Price API."""
+import asyncio
+import logging
+import os
+from typing import Any
+
+import httpx
+
+import metrics
+from azure_prices import PriceCache, PriceResult, build_price_url, fetch_price_pages
+from price_catalog import PriceCatalog, UnsupportedFilter
+from resources import run_blocking
+from runtime import USER_AGENT, http_pool, mcp, single_flight, upstream_client
+from upstream import CircuitOpen
+
+logger = logging.getLogger(__name__)
+
+# The upstream URL can be overridden from the environment (e.g. a stub server in benchmarks)
+AZURE_PRICE_API_BASE = os.environ.get("AZURE_PRICE_API_BASE", "https://prices.azure.com/api/retail/prices")
+http_pool.register(AZURE_PRICE_API_BASE, "azure_prices", timeout=float(os.environ.get("AZURE_PRICE_TIMEOUT", 10.0)))
+
+# Azure price paging budget and parsed-result cache (AZURE_PRICE_CACHE_* settings)
+AZURE_PRICE_MAX_PAGES = int(os.environ.get("AZURE_PRICE_MAX_PAGES", 3))
+AZURE_PRICE_PAGE_LIMIT = int(os.environ.get("AZURE_PRICE_PAGE_LIMIT", 20))
+price_cache = PriceCache.from_env()
+# Optional local copy of the catalog (AZURE_PRICE_CATALOG_* settings)
+price_catalog = PriceCatalog.from_env()
+
+metrics.register_cache("azure_price", price_cache.stats, stale="stale_served")
+metrics.register_cache("azure_price_catalog", lambda: price_catalog.stats() if price_catalog else None,
+                       hits="queries", misses="unsupported_filters", size="rows")
+
+azure_price_flight = single_flight("azure_prices")
+_catalog_task: asyncio.Task | None = None
+
+# fetch Azure Price API by using odata query
+@mcp.tool()
+async def get_azure_price(filter_expression: str, max_pages: int = None) -> str:
+    """Get Azure price for a service using OData filter expressions.
+
+    Args:
+        filter_expression: OData filter expression. Example: contains(armSkuName, 'Standard_D2_v3') and contains(armRegionName, 'eastus')
+        max_pages: Maximum number of result pages (1000 items each) to fetch (default 3)
+    """
+    max_pages = max(1, min(max_pages or AZURE_PRICE_MAX_PAGES, AZURE_PRICE_PAGE_LIMIT))
+
+    # Cache hits skip the network completely
+    result = price_cache.get(filter_expression, max_pages)
+    if result is None and price_catalog is not None:
+        # Answer from the local catalog when the filter is in the supported subset
+        try:
+            limit = max_pages * 1000
+            items, total = price_catalog.query(filter_expression, limit)
+            result = PriceResult(items=items, pages=0, truncated=total > limit)
+        except UnsupportedFilter:
+            pass
+    stale = False
+    if result is None:
+        result = await fetch_price_pages(build_price_url(AZURE_PRICE_API_BASE, filter_expression), make_azure_price_request, max_pages)
+        price_cache.put(filter_expression, max_pages, result)
+        if not result.complete:
+            # The API failed part way; an older complete answer beats a partial one
+            previous = price_cache.get_stale(filter_expression, max_pages)
+            if previous is not None:
+                result, stale = previous, True
+
+    all_items = result.items
+    if not all_items:
+        return "Unable to fetch Azure price data for this filter expression or no results found."
+    
+    # Format the price data into a readable string
+    prices = []
+    for item in all_items:
+        price_info = []
+        # Extract key information
+        if "productName" in item:
+            price_info.append(f"Product: {item['productName']}")
+        if "skuName" in item:
+            price_info.append(f"SKU: {item['skuName']}")
+        if "retailPrice" in item:
+            price_info.append(f"Price: {item['retailPrice']} USD")
+        if "unitOfMeasure" in item:
+            price_info.append(f"Per: {item['unitOfMeasure']}")
+        if "armRegionName" in item:
+            price_info.append(f"Region: {item['armRegionName']}")
+            
+        prices.append("\n".join(price_info))
+
+    summary = f"Found {len(all_items)} pricing items (showing all)"
+    if result.truncated:
+        summary = f"Found {len(all_items)} pricing items (limited to {max_pages} pages)"
+    if stale:
+        summary += " (cached result; the Azure Price API is currently unavailable)"
+        
+    return f"{summary}\n\n" + "\n\n---\n\n".join(prices)
+
+async def make_azure_price_request(url: str) -> dict[str, Any] | None:
+    """Make a request to the Azure Price API with proper error handling."""
+    return await azure_price_flight.do(url, lambda: fetch_azure_price(url))
+
+async def fetch_azure_price(url: str) -> dict[str, Any] | None:
+    headers = {
+        "User-Agent": USER_AGENT,
+        "Accept": "application/json",
+        "Content-Type": "application/json"
+    }   
+    try:
+        response = await upstream_client.get(url, headers=headers)
+        response.raise_for_status()
+        return response.json()
+    except CircuitOpen as e:
+        logger.warning("Skipping Azure price request: %s", e)
+        return None
+    except httpx.TimeoutException:
+        logger.warning("Timeout while fetching Azure price data from %s", url)
+        return None
+    except httpx.HTTPStatusError as e:
+        logger.warning("HTTP error %s while fetching Azure price data: %s", e.response.status_code, e.response.text)
+        return None
+    except Exception as e:
+        logger.warning("Error fetching Azure price data: %s", e)
+        return None
+
+
+async def startup() -> None:
+    """Keep the local Azure price catalog in sync in the background."""
+    global _catalog_task
+    if price_catalog is not None:
+        try:
+            await run_blocking(price_catalog.load)
+        except Exception as e:
+            # A damaged catalog must not stop the server: prices come from the API until it is re-synced
+            logger.warning("Could not load the Azure price catalog from %s: %s: %s", price_catalog.path, type(e).__name__, e)
+        _catalog_task = asyncio.create_task(price_catalog.run_refresh_loop(AZURE_PRICE_API_BASE, make_azure_price_request))
+
+
+async def shutdown() -> None:
+    if _catalog_task is not None:
+        _catalog_task.cancel()
+
+
+def stats() -> dict:
+    return {
+        "azure_price_cache": price_cache.stats(),
+        "azure_price_catalog": price_catalog.stats() if price_catalog else None,
+    }
@@ -0,0 +1,59 @@
+"""Utility tools: Chinese character counting, in-process or on the Azure Function.
+
+``function.chinese_counter`` imports NumPy, so it is imported on first use and
+by ``warmup()`` rather than when the group loads.
+"""
+import importlib
+import os
+
+from resources import run_blocking
+from runtime import http_pool, mcp, upstream_client
+
+CHAR_COUNT_FUNCTION_URL = os.environ.get("CHAR_COUNT_FUNCTION_URL", "https://haxufunctions.azurewebsites.net/api/http_trigger")
+http_pool.register(CHAR_COUNT_FUNCTION_URL, "char_count_function", timeout=float(os.environ.get("CHAR_COUNT_TIMEOUT", 10.0)))
+
+# Chinese characters are counted in-process unless CHAR_COUNT_MODE=remote
+CHAR_COUNT_MODE = os.environ.get("CHAR_COUNT_MODE", "local").lower()
+CHAR_COUNT_OFFLOAD_LENGTH = int(os.environ.get("CHAR_COUNT_OFFLOAD_LENGTH", 1 << 20))
+
+@mcp.tool()
+async def count_chinese_characters(text: str, ext_a: bool = False, ext_b: bool = False, punctuation: bool = False) -> str:
+    """Count the number of Chinese characters in a string. Use when the user asks about the word count.
+    
+    Args:
+        text: The input text string containing Chinese characters
+        ext_a: Also count CJK Extension A characters (U+3400-U+4DBF)
+        ext_b: Also count CJK Extension B characters (U+20000-U+2A6DF)
+        punctuation: Also count Chinese punctuation such as ，。！？“”《》
+    """
+    if CHAR_COUNT_MODE != "remote":
+        from function.chinese_counter import count_chinese, format_count
+
+        # Counted in-process; large texts go to the blocking pool so the event loop stays free
+        if len(text) >= CHAR_COUNT_OFFLOAD_LENGTH:
+            count = await run_blocking(count_chinese, text, ext_a, ext_b, punctuation)
+        else:
+            count = count_chinese(text, ext_a, ext_b, punctuation)
+        return f"Chinese character count: {format_count(count)}"
+
+    # The text goes in a raw POST body, which the function counts chunk by chunk. Lone
+    # surrogates have no UTF-8 form; they become "?", which is not counted either way.
+    params = {name: "true" for name, enabled in (("ext_a", ext_a), ("ext_b", ext_b), ("punctuation", punctuation)) if enabled}
+    headers = {"Content-Type": "text/plain; charset=utf-8"}
+
+    try:
+        # POSTs are not retried, but a failing function still trips its breaker
+        async with upstream_client.guard("char_count_function"):
+            response = await http_pool.post(CHAR_COUNT_FUNCTION_URL, params=params, content=text.encode("utf-8", "replace"), headers=headers)
+            if response.status_code >= 500:
+                response.raise_for_status()
+        response.raise_for_status()
+        return f"Chinese character count: {response.text}"
+    except Exception as e:
+        return f"Error counting Chinese characters: {str(e)}"
+
+
+async def warmup() -> None:
+    """Import the counter (and NumPy) on the blocking pool ahead of the first call."""
+    if CHAR_COUNT_MODE != "remote":
+        await run_blocking(importlib.import_module, "function.chinese_counter")
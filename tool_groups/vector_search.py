@@ -0,0 +1,154 @@
+"""Semantic search over the GDPR and China PIPL corpora.
+
+The Supabase and Azure OpenAI SDKs are the most expensive imports in the
+server (``langchain_openai`` alone takes over a second), so they are imported
+by the client factories on first use. ``warmup()`` imports them in the
+background once the server is up.
+"""
+import importlib
+import os
+
+import metrics
+from embedding_cache import EmbeddingCache, normalize_query
+from resources import run_blocking
+from runtime import mcp, resources, single_flight, upstream_client
+from vector_index import LocalVectorIndex
+
+# Imported on first use (or by warmup()) instead of with this module
+SDK_MODULES = ("supabase", "langchain_openai")
+
+# Query embeddings, keyed on normalized query text (EMBEDDING_CACHE_* settings)
+embedding_cache = EmbeddingCache.from_env()
+metrics.register_cache("embedding", embedding_cache.stats)
+
+def create_supabase_client():
+    from supabase import create_client
+    return create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+
+def create_embedding_model():
+    from langchain_openai import AzureOpenAIEmbeddings
+    return AzureOpenAIEmbeddings(
+        azure_deployment="text-embedding-ada-002",
+        model="text-embedding-ada-002",
+        api_version=os.environ["AZURE_OPENAI_API_VERSION"]
+    )
+
+# Retrieval backend: "supabase" calls the match_* RPCs, "local" searches an in-process index
+VECTOR_BACKEND = os.environ.get("VECTOR_BACKEND", "supabase").lower()
+
+# RPC name -> (index path variable, Supabase table) for the local backend
+LOCAL_INDEXES = {
+    "match_documents": ("GDPR_INDEX_PATH", os.environ.get("GDPR_TABLE", "documents")),
+    "match_pipl_documents": ("PIPL_INDEX_PATH", os.environ.get("PIPL_TABLE", "pipl_documents")),
+}
+
+def create_local_index(rpc_name: str) -> LocalVectorIndex:
+    """Load a corpus from disk if configured, otherwise download it from Supabase once."""
+    path_variable, table = LOCAL_INDEXES[rpc_name]
+    path = os.environ.get(path_variable)
+    if path:
+        return LocalVectorIndex.load(path)
+    return LocalVectorIndex.from_supabase(resources.get("supabase"), table)
+
+# Clients are built once on first use and shared by every search
+resources.register("supabase", create_supabase_client)
+resources.register("embedding_model", create_embedding_model)
+for _rpc_name in LOCAL_INDEXES:
+    resources.register(f"index:{_rpc_name}", lambda rpc_name=_rpc_name: create_local_index(rpc_name))
+
+# Concurrent identical queries share one embedding call and one RPC
+embedding_flight = single_flight("embeddings")
+search_flight = single_flight("semantic_search")
+
+async def semantic_search(rpc_name: str, query_text: str, match_threshold: float = 0.5, match_count: int = 3) -> list:
+    """Embed the query and run a pgvector similarity RPC without blocking the event loop."""
+    key = (rpc_name, normalize_query(query_text), match_threshold, match_count)
+    return await search_flight.do(key, lambda: run_semantic_search(rpc_name, query_text, match_threshold, match_count))
+
+async def embed_query(text: str) -> list[float]:
+    async def embed() -> list[float]:
+        embedding_model = await resources.aget("embedding_model")
+        # Generate embedding for the query text using Azure OpenAI
+        async with upstream_client.guard("azure_openai"), metrics.upstream("azure_openai", operation="embed_query"):
+            return await run_blocking(embedding_model.embed_query, text)
+
+    # Keyed like the embedding cache, so GDPR and PIPL searches for one query share the call
+    return await embedding_flight.do(normalize_query(text), embed)
+
+async def run_semantic_search(rpc_name: str, query_text: str, match_threshold: float, match_count: int) -> list:
+    query_embedding = await embedding_cache.get_or_compute(query_text, embed_query)
+
+    if VECTOR_BACKEND == "local":
+        index = await resources.aget(f"index:{rpc_name}")
+        return index.match(query_embedding, match_threshold, match_count)
+
+    supabase = await resources.aget("supabase")
+
+    # Perform vector similarity search using pgvector
+    async with upstream_client.guard("supabase"), metrics.upstream("supabase", operation=rpc_name):
+        response = await run_blocking(
+            supabase.rpc(
+                rpc_name,
+                {
+                    'query_embedding': query_embedding.tolist(),
+                    'match_threshold': match_threshold,
+                    'match_count': match_count
+                }
+            ).execute
+        )
+    return response.data
+
+@mcp.tool()
+async def gdpr_semantic_search(query_text):
+    """
+    Perform semantic search against the GDPR. 
+
+    GDPR is a comprehensive data protection and privacy regulation enacted by the European Union that came into effect on May 25, 2018. 
+    It represents one of the most significant and stringent privacy laws in the world.
+    
+    Args:
+        query_text (str): The text of search query
+        
+    Returns:
+        list: Raw matching documents with similarity scores, containing up to 3 results
+              with similarity above 0.5 threshold
+    """
+    return await semantic_search('match_documents', query_text)
+
+
+@mcp.tool()
+async def China_pipl_semantic_search(query_text):
+    """
+    Perform semantic search against China PIPL.
+
+    China's Personal Information Protection Law (PIPL) is a comprehensive data protection law that regulates the processing of personal information in China.
+    PIPL is China's first comprehensive national data privacy law that came into effect on November 1, 2021. 
+    It establishes a framework for the protection of personal information in China.
+    
+    Args:
+        query_text (str): The text of search query
+
+        
+    Returns:
+        list: Raw matching documents with similarity scores, containing up to 3 results
+              with similarity above 0.5 threshold
+    """
+    return await semantic_search("match_pipl_documents", query_text)
+
+
+def import_sdks() -> None:
+    for name in SDK_MODULES:
+        importlib.import_module(name)
+
+
+async def warmup() -> None:
+    """Import the SDKs on the blocking pool so the first search does not pay for it."""
+    await run_blocking(import_sdks)
+
+
+async def shutdown() -> None:
+    embedding_cache.flush()
+
+
+def stats() -> dict:
+    return {"embedding_cache": embedding_cache.stats()}
@@ -0,0 +1,223 @@
+"""National Weather Service tools: alerts and forecasts, single and batched."""
+import asyncio
+import os
+from typing import Any
+
+import metrics
+from runtime import USER_AGENT, http_pool, mcp, single_flight, upstream_client
+from weather_cache import ConditionalCache, GridPointCache, round_coordinates
+
+# The upstream URL can be overridden from the environment (e.g. a stub server in benchmarks)
+NWS_API_BASE = os.environ.get("NWS_API_BASE", "https://api.weather.gov")
+http_pool.register(NWS_API_BASE, "nws", timeout=float(os.environ.get("NWS_TIMEOUT", 30.0)))
+
+# Coordinates -> NWS grid (NWS_GRID_CACHE_* settings) and per-grid/state payloads (NWS_CACHE_*)
+grid_cache = GridPointCache.from_env()
+nws_cache = ConditionalCache.from_env()
+metrics.register_cache("nws_grid", grid_cache.stats)
+metrics.register_cache("nws", nws_cache.stats)
+
+nws_flight = single_flight("nws")
+
+# New grid mappings are written to NWS_GRID_CACHE_PATH in batches, this often
+NWS_GRID_CACHE_FLUSH_INTERVAL = float(os.environ.get("NWS_GRID_CACHE_FLUSH_INTERVAL", 30.0))
+_persist_task: asyncio.Task | None = None
+
+async def make_nws_request(url: str, cached: bool = True) -> dict[str, Any] | None:
+    """Make a request to the NWS API with proper error handling."""
+    return await nws_flight.do((url, cached), lambda: fetch_nws(url, cached))
+
+async def fetch_nws(url: str, cached: bool) -> dict[str, Any] | None:
+    headers = {
+        "User-Agent": USER_AGENT,
+        "Accept": "application/geo+json"
+    }
+    try:
+        if cached:
+            return await nws_cache.get_json(url, upstream_client.get, headers)
+        response = await upstream_client.get(url, headers=headers)
+        response.raise_for_status()
+        return response.json()
+    except Exception:
+        return None
+
+def format_alert(feature: dict) -> str:
+    """Format an alert feature into a readable string."""
+    props = feature["properties"]
+    return f"""
+    Event: {props.get('event', 'Unknown')}
+    Area: {props.get('areaDesc', 'Unknown')}
+    Severity: {props.get('severity', 'Unknown')}
+    Description: {props.get('description', 'No description available')}
+    Instructions: {props.get('instruction', 'No specific instructions provided')}
+    """
+
+def format_alerts(data: dict[str, Any] | None) -> str:
+    """Format an alerts response, or explain why there is nothing to show."""
+    if not data or "features" not in data:
+        return "Unable to fetch alerts or no alerts found."
+
+    if not data["features"]:
+        return "No active alerts for this state."
+
+    alerts = [format_alert(feature) for feature in data["features"]]
+    return "\n---\n".join(alerts)
+
+def format_forecast(forecast_data: dict[str, Any]) -> str:
+    """Format the first forecast periods into a readable forecast."""
+    periods = forecast_data["properties"]["periods"]
+    forecasts = []
+    for period in periods[:5]:  # Only show next 5 periods
+        forecast = f"""
+        {period['name']}:
+        Temperature: {period['temperature']}°{period['temperatureUnit']}
+        Wind: {period['windSpeed']} {period['windDirection']}
+        Forecast: {period['detailedForecast']}
+        """
+        forecasts.append(forecast)
+
+    return "\n---\n".join(forecasts)
+
+async def resolve_grid(latitude: float, longitude: float) -> dict[str, Any] | None:
+    """Return the NWS grid endpoints for a location, which never change for a location."""
+    grid = grid_cache.get(latitude, longitude)
+    if grid is None:
+        latitude, longitude = round_coordinates(latitude, longitude)
+        points_url = f"{NWS_API_BASE}/points/{latitude},{longitude}"
+        points_data = await make_nws_request(points_url, cached=False)
+
+        if not points_data:
+            return None
+        grid = grid_cache.put(latitude, longitude, points_data["properties"])
+    return grid
+
+@mcp.tool()
+async def get_alerts(state: str) -> str:
+    """Get weather alerts for a US state.
+
+    Args:
+        state: Two-letter US state code (e.g. CA, NY)
+    """
+    url = f"{NWS_API_BASE}/alerts/active/area/{state.upper()}"
+    return format_alerts(await make_nws_request(url))
+
+@mcp.tool()
+async def get_forecast(latitude: float, longitude: float) -> str:
+    """Get weather forecast for a location.
+
+    Args:
+        latitude: Latitude of the location
+        longitude: Longitude of the location
+    """
+    # First get the forecast grid endpoint
+    grid = await resolve_grid(latitude, longitude)
+    if grid is None:
+        return "Unable to fetch forecast data for this location."
+
+    # Get the forecast URL from the points response
+    forecast_data = await make_nws_request(grid["forecast"])
+
+    if not forecast_data:
+        return "Unable to fetch detailed forecast."
+
+    return format_forecast(forecast_data)
+
+# Upstream calls in flight per batch tool call, and max members per batch
+NWS_BATCH_CONCURRENCY = int(os.environ.get("NWS_BATCH_CONCURRENCY", 8))
+NWS_BATCH_LIMIT = int(os.environ.get("NWS_BATCH_LIMIT", 50))
+
+def batch_error(what: str, error: Exception) -> str:
+    """Section text for one batch member that failed, so the rest of the batch still succeeds."""
+    return f"Error fetching {what}: {type(error).__name__}: {error}"
+
+@mcp.tool()
+async def get_alerts_batch(states: list[str]) -> str:
+    """Get weather alerts for several US states at once.
+
+    Args:
+        states: Two-letter US state codes (e.g. ["CA", "NY", "TX"])
+    """
+    states = list(dict.fromkeys(state.strip().upper() for state in states))
+    if not states or len(states) > NWS_BATCH_LIMIT:
+        return f"Provide between 1 and {NWS_BATCH_LIMIT} state codes."
+
+    limit = asyncio.Semaphore(NWS_BATCH_CONCURRENCY)
+
+    async def fetch(state: str) -> str:
+        try:
+            async with limit:
+                data = await make_nws_request(f"{NWS_API_BASE}/alerts/active/area/{state}")
+            return f"## {state}\n{format_alerts(data)}"
+        except Exception as e:
+            return f"## {state}\n{batch_error('alerts', e)}"
+
+    # Every state is fetched concurrently; a failed state only affects its own section
+    sections = await asyncio.gather(*(fetch(state) for state in states))
+    return "\n\n".join(sections)
+
+@mcp.tool()
+async def get_forecast_batch(locations: list[dict[str, float]]) -> str:
+    """Get weather forecasts for several locations at once.
+
+    Args:
+        locations: List of {"latitude": ..., "longitude": ...} objects
+    """
+    if not locations or len(locations) > NWS_BATCH_LIMIT:
+        return f"Provide between 1 and {NWS_BATCH_LIMIT} locations."
+    try:
+        coordinates = [round_coordinates(float(loc["latitude"]), float(loc["longitude"])) for loc in locations]
+    except (KeyError, TypeError, ValueError):
+        return 'Each location needs numeric "latitude" and "longitude" values.'
+
+    limit = asyncio.Semaphore(NWS_BATCH_CONCURRENCY)
+    # One request per forecast URL, so locations in the same grid cell share it
+    forecast_requests: dict[str, asyncio.Task] = {}
+
+    async def fetch_forecast(url: str) -> dict[str, Any] | None:
+        async with limit:
+            return await make_nws_request(url)
+
+    async def forecast_for(latitude: float, longitude: float) -> str:
+        try:
+            async with limit:
+                grid = await resolve_grid(latitude, longitude)
+            if grid is None:
+                return "Unable to fetch forecast data for this location."
+            url = grid["forecast"]
+            if url not in forecast_requests:
+                forecast_requests[url] = asyncio.create_task(fetch_forecast(url))
+            forecast_data = await forecast_requests[url]
+            if not forecast_data:
+                return "Unable to fetch detailed forecast."
+            return format_forecast(forecast_data)
+        except Exception as e:
+            # e.g. a points or forecast payload without the expected fields
+            return batch_error("forecast", e)
+
+    # Each distinct location runs its own points -> forecast chain concurrently,
+    # so the batch takes about as long as its slowest member
+    unique = list(dict.fromkeys(coordinates))
+    results = dict(zip(unique, await asyncio.gather(*(forecast_for(*c) for c in unique))))
+    return "\n\n".join(f"## {latitude}, {longitude}\n{results[(latitude, longitude)]}" for latitude, longitude in coordinates)
+
+
+async def persist_grid_cache() -> None:
+    while True:
+        await asyncio.sleep(NWS_GRID_CACHE_FLUSH_INTERVAL)
+        await grid_cache.persist()
+
+
+async def startup() -> None:
+    global _persist_task
+    if grid_cache.path:
+        _persist_task = asyncio.create_task(persist_grid_cache())
+
+
+async def shutdown() -> None:
+    if _persist_task is not None:
+        _persist_task.cancel()
+    grid_cache.flush()
+
+
+def stats() -> dict:
+    return {"nws_grid_cache": grid_cache.stats(), "nws_cache": nws_cache.stats()}
@@ -0,0 +1,257 @@
+"""Resilient outbound calls: retries, hedged requests and per-upstream circuit breakers.
+
+``ResilientClient.get`` wraps ``HttpClientPool.get`` for idempotent GETs:
+
+* Transport errors, timeouts and 429/5xx replies are retried with full-jitter
+  exponential backoff. All attempts share one time budget, by default the
+  upstream's configured timeout, so retrying never makes a call slower than a
+  single timed-out attempt used to be.
+* With ``hedge_after`` set, a second identical request is sent if the first
+  has not answered within that many seconds. Whichever reply arrives first
+  wins, and the other request is cancelled.
+* Every upstream (named as in ``HttpClientPool.register``) has a circuit
+  breaker. After ``failure_threshold`` consecutive failures it opens, and calls
+  fail at once with :class:`CircuitOpen` for ``reset_timeout`` seconds. After
+  that a single probe call decides whether it closes again.
+
+SDK calls that do not go through the pool (Supabase, Azure OpenAI) can use the
+same breakers via ``async with client.guard(name):``.
+"""
+import asyncio
+import contextlib
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable
+
+import httpx
+
+from http_pool import HttpClientPool
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+
+class CircuitOpen(Exception):
+    """The upstream's breaker is open; the call was not attempted."""
+
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(f"{upstream} is unavailable (circuit open, retry in {retry_after:.1f}s)")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe."""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self.failures = 0
+        self.opens = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+        return self._state
+
+    def before_call(self) -> None:
+        """Raise :class:`CircuitOpen` unless a call may go ahead now."""
+        state = self.state
+        if state == CLOSED:
+            return
+        if state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        self.rejected += 1
+        retry_after = max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+        raise CircuitOpen(self.name, retry_after)
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._probing = False
+        self._state = CLOSED
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self._state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self._state != OPEN:
+                self.opens += 1
+            self._state = OPEN
+            self._opened_at = self._clock()
+
+    def release(self) -> None:
+        """The call ended without a verdict (e.g. it was cancelled)."""
+        self._probing = False
+
+    @contextlib.asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """Run one call under the breaker; any exception counts as a failure."""
+        self.before_call()
+        try:
+            yield
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            self.release()
+            raise
+        self.record_success()
+
+    def stats(self) -> dict[str, Any]:
+        return {"state": self.state, "failures": self.failures, "opens": self.opens, "rejected": self.rejected}
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    attempts: int = 3
+    base_delay: float = 0.2
+    max_delay: float = 2.0
+    retry_statuses: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+
+    def delay(self, attempt: int, retry_after: float | None = None) -> float:
+        """Full-jitter backoff before retry number ``attempt`` (0-based); honours Retry-After."""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0.0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+def retry_after_seconds(response: httpx.Response) -> float | None:
+    value = response.headers.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:  # HTTP-date form; fall back to backoff
+        return None
+
+
+class ResilientClient:
+    """Retries, hedging and circuit breaking on top of an :class:`HttpClientPool`."""
+
+    def __init__(
+        self,
+        pool: HttpClientPool,
+        retry: RetryPolicy | None = None,
+        hedge_after: float | None = None,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        self.pool = pool
+        self.retry = retry or RetryPolicy()
+        self.hedge_after = hedge_after
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @classmethod
+    def from_env(cls, pool: HttpClientPool) -> "ResilientClient":
+        hedge_after = float(os.environ.get("UPSTREAM_HEDGE_AFTER", 0.0))
+        return cls(
+            pool,
+            retry=RetryPolicy(
+                attempts=max(1, int(os.environ.get("UPSTREAM_RETRY_ATTEMPTS", 3))),
+                base_delay=float(os.environ.get("UPSTREAM_RETRY_BASE_DELAY", 0.2)),
+                max_delay=float(os.environ.get("UPSTREAM_RETRY_MAX_DELAY", 2.0)),
+            ),
+            hedge_after=hedge_after if hedge_after > 0 else None,
+            failure_threshold=int(os.environ.get("UPSTREAM_BREAKER_FAILURES", 5)),
+            reset_timeout=float(os.environ.get("UPSTREAM_BREAKER_RESET", 30.0)),
+        )
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = self._breakers[name] = CircuitBreaker(name, self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    def guard(self, name: str) -> contextlib.AbstractAsyncContextManager:
+        """Circuit breaker for a call that does not go through :meth:`get`."""
+        return self.breaker(name).guard()
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        """GET with retries, optional hedging and the upstream's circuit breaker.
+
+        Returns the last response once retries are exhausted (the caller still
+        decides what a 5xx means). Raises the last transport error, or
+        :class:`CircuitOpen` while the upstream is considered down.
+        """
+        breaker = self.breaker(self.pool.name_for(url))
+        config = self.pool.config_for(url)
+        deadline = time.monotonic() + (kwargs.pop("budget", None) or config.timeout)
+        for attempt in range(self.retry.attempts):
+            remaining = deadline - time.monotonic()
+            timeout = httpx.Timeout(remaining, connect=min(config.connect_timeout, remaining))
+            breaker.before_call()
+            try:
+                response = await self._send(url, timeout=timeout, **kwargs)
+            except httpx.TransportError:
+                breaker.record_failure()
+                delay = self.retry.delay(attempt)
+                if not self._may_retry(attempt, deadline, delay):
+                    raise
+            except BaseException:
+                breaker.release()
+                raise
+            else:
+                if response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                delay = self.retry.delay(attempt, retry_after_seconds(response))
+                if response.status_code not in self.retry.retry_statuses or not self._may_retry(attempt, deadline, delay):
+                    return response
+            self.retries += 1
+            await asyncio.sleep(delay)
+        raise AssertionError("unreachable")  # the last attempt always returns or raises
+
+    def _may_retry(self, attempt: int, deadline: float, delay: float) -> bool:
+        """Another attempt is allowed and still has time left after the backoff."""
+        if attempt + 1 >= self.retry.attempts:
+            return False
+        return deadline - time.monotonic() - delay > 0.05
+
+    async def _send(self, url: str, **kwargs: Any) -> httpx.Response:
+        if self.hedge_after is None:
+            return await self.pool.get(url, **kwargs)
+
+        first = asyncio.ensure_future(self.pool.get(url, **kwargs))
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if done:
+                return first.result()
+            # The first request is slow: race an identical one against it
+            self.hedges += 1
+            tasks.append(asyncio.ensure_future(self.pool.get(url, **kwargs)))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+            return first.result()  # both failed; raise the first error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "breakers": {name: breaker.stats() for name, breaker in self._breakers.items()},
+        }
@@ -0,0 +1,115 @@
+"""In-process vector index that answers the same queries as the Supabase RPCs.
+
+The GDPR and PIPL corpora are small and fixed, so their embeddings can be held
+in one float32 matrix (optionally memory-mapped from disk) and searched with a
+single matrix-vector product. ``LocalVectorIndex.match`` returns rows in the
+same shape as ``match_documents`` / ``match_pipl_documents``: every document
+column except the embedding, plus ``similarity``, ordered by similarity and
+filtered with ``similarity > match_threshold``.
+"""
+import json
+import os
+from typing import Any, Iterable, Sequence
+
+import numpy as np
+
+EMBEDDING_COLUMN = "embedding"
+
+
+def _parse_embedding(value: Any) -> list[float]:
+    # PostgREST returns pgvector columns as their text form, e.g. "[0.1,0.2]"
+    if isinstance(value, str):
+        return json.loads(value)
+    return list(value)
+
+
+class LocalVectorIndex:
+    """Cosine-similarity search over an in-memory or memory-mapped matrix."""
+
+    def __init__(self, records: Sequence[dict[str, Any]], embeddings: np.ndarray):
+        if len(records) != embeddings.shape[0]:
+            raise ValueError(f"{len(records)} records but {embeddings.shape[0]} embeddings")
+        self.records = list(records)
+        self.embeddings = embeddings
+        norms = np.linalg.norm(embeddings, axis=1).astype(np.float32)
+        # Zero vectors can never match; give them an infinite norm so their score is 0
+        norms[norms == 0] = np.inf
+        self._norms = norms
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def dim(self) -> int:
+        return self.embeddings.shape[1]
+
+    @classmethod
+    def from_records(cls, rows: Iterable[dict[str, Any]]) -> "LocalVectorIndex":
+        """Build an index from rows that carry their vector in an ``embedding`` column."""
+        records, vectors = [], []
+        for row in rows:
+            row = dict(row)
+            vectors.append(_parse_embedding(row.pop(EMBEDDING_COLUMN)))
+            records.append(row)
+        if not records:
+            # An empty table has no vectors to take the dimension from
+            return cls(records, np.zeros((0, 0), dtype=np.float32))
+        return cls(records, np.asarray(vectors, dtype=np.float32).reshape(len(records), -1))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "LocalVectorIndex":
+        """Load an index from disk.
+
+        ``path`` is either a ``.json`` file of rows with embeddings (such as the
+        offline fixture corpus) or a prefix written by :meth:`save`, in which
+        case ``<path>.npy`` is memory-mapped read-only.
+        """
+        if path.endswith(".json"):
+            with open(path, encoding="utf-8") as f:
+                return cls.from_records(json.load(f))
+        with open(f"{path}.json", encoding="utf-8") as f:
+            records = json.load(f)
+        embeddings = np.load(f"{path}.npy", mmap_mode="r" if mmap else None)
+        return cls(records, embeddings)
+
+    @classmethod
+    def from_supabase(cls, client, table: str, page_size: int = 1000) -> "LocalVectorIndex":
+        """Download every row of a Supabase documents table into an index."""
+        rows, start = [], 0
+        while True:
+            page = client.table(table).select("*").order("id").range(start, start + page_size - 1).execute().data
+            rows.extend(page)
+            if len(page) < page_size:
+                break
+            start += page_size
+        return cls.from_records(rows)
+
+    def save(self, path: str) -> None:
+        """Write ``<path>.npy`` (float32 matrix) and ``<path>.json`` (rows without embeddings)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.save(f"{path}.npy", np.asarray(self.embeddings, dtype=np.float32))
+        with open(f"{path}.json", "w", encoding="utf-8") as f:
+            json.dump(self.records, f, ensure_ascii=False)
+
+    def similarities(self, query_embedding: Sequence[float] | np.ndarray) -> np.ndarray:
+        """Cosine similarity of the query against every document."""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if not self.records:
+            return np.zeros(0, dtype=np.float32)
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0:
+            return np.zeros(len(self.records), dtype=np.float32)
+        return (self.embeddings @ query) / (self._norms * query_norm)
+
+    def match(self, query_embedding: Sequence[float] | np.ndarray, match_threshold: float, match_count: int) -> list[dict[str, Any]]:
+        """Top ``match_count`` documents with similarity above ``match_threshold``."""
+        if match_count <= 0 or not self.records:
+            return []
+        scores = self.similarities(query_embedding)
+        candidates = np.flatnonzero(scores > match_threshold)
+        if candidates.size > match_count:
+            top = np.argpartition(-scores[candidates], match_count - 1)[:match_count]
+            candidates = candidates[top]
+        # Stable sort keeps document order for equal scores
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [{**self.records[i], "similarity": float(scores[i])} for i in order]
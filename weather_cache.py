@@ -0,0 +1,283 @@
+"""Two-level cache for the NWS weather tools.
+
+Level 1 maps rounded coordinates to their NWS grid endpoints. That mapping
+does not change, so it is kept for a long time and can be persisted to a JSON
+file. Level 2 caches forecast and alert payloads per URL, which means per
+grid cell or per state. It follows the ``Cache-Control`` / ``Expires`` headers
+sent by NWS. Once an entry goes stale it is revalidated with ``If-None-Match`` /
+``If-Modified-Since``, and a ``304 Not Modified`` reply reuses the cached body.
+If the upstream cannot be reached or answers with a 5xx, a stale entry is
+served instead of failing.
+"""
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable
+
+import httpx
+
+from cache import TTLCache
+from resources import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# 4 decimal places (~11 m) is the precision the NWS points endpoint accepts
+COORDINATE_PRECISION = 4
+GRID_FIELDS = ("forecast", "forecastHourly", "forecastGridData", "gridId", "gridX", "gridY")
+
+_MAX_AGE = re.compile(r"(?:^|,)\s*(s-maxage|max-age)\s*=\s*\"?(\d+)", re.IGNORECASE)
+
+
+def round_coordinates(latitude: float, longitude: float) -> tuple[float, float]:
+    return round(latitude, COORDINATE_PRECISION), round(longitude, COORDINATE_PRECISION)
+
+
+class GridPointCache:
+    """Rounded (lat, lon) -> NWS grid endpoints, optionally persisted to ``path``.
+
+    At most ``maxsize`` locations are kept (least recently used goes first).
+    New entries are not written one by one: :meth:`persist` writes all
+    pending changes on the blocking pool, and the weather tools call it
+    periodically and on shutdown. A failed write is logged and retried on
+    the next call; it never fails a tool call.
+    """
+
+    def __init__(self, path: str | None = None, ttl: float = 30 * 86400.0, maxsize: int = 10000,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._clock = clock
+        self._grids: "OrderedDict[str, dict[str, Any]]" = OrderedDict()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.write_errors = 0
+        self._load()
+
+    @classmethod
+    def from_env(cls) -> "GridPointCache":
+        return cls(
+            path=os.environ.get("NWS_GRID_CACHE_PATH") or None,
+            ttl=float(os.environ.get("NWS_GRID_CACHE_TTL", 30 * 86400.0)),
+            maxsize=int(os.environ.get("NWS_GRID_CACHE_SIZE", 10000)),
+        )
+
+    @staticmethod
+    def _key(latitude: float, longitude: float) -> str:
+        latitude, longitude = round_coordinates(latitude, longitude)
+        return f"{latitude},{longitude}"
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                grids = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable NWS grid cache %s: %s", self.path, e)
+            return
+        # Oldest first, so the most recently cached locations survive the size limit
+        for key, grid in sorted(grids.items(), key=lambda item: item[1].get("cached_at", 0))[-self.maxsize:]:
+            self._grids[key] = grid
+
+    def _write(self, grids: dict[str, dict[str, Any]]) -> bool:
+        """Atomically replace the file with ``grids``; a failure is logged, not raised."""
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(prefix=".grid-cache-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(grids, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            return True
+        except OSError as e:
+            self.write_errors += 1
+            logger.warning("Could not write the NWS grid cache to %s: %s", self.path, e)
+            return False
+
+    def _take_snapshot(self) -> dict[str, dict[str, Any]] | None:
+        if not self.path or not self._dirty:
+            return None
+        self._dirty = False
+        return dict(self._grids)
+
+    async def persist(self) -> None:
+        """Write pending changes on the blocking pool."""
+        snapshot = self._take_snapshot()
+        if snapshot is not None and not await run_blocking(self._write, snapshot):
+            self._dirty = True
+
+    def flush(self) -> None:
+        """Write pending changes on the calling thread (e.g. at shutdown)."""
+        snapshot = self._take_snapshot()
+        if snapshot is not None and not self._write(snapshot):
+            self._dirty = True
+
+    def get(self, latitude: float, longitude: float) -> dict[str, Any] | None:
+        key = self._key(latitude, longitude)
+        grid = self._grids.get(key)
+        if grid is not None and self._clock() - grid["cached_at"] < self.ttl:
+            self._grids.move_to_end(key)
+            self.hits += 1
+            return grid
+        self.misses += 1
+        return None
+
+    def put(self, latitude: float, longitude: float, properties: dict[str, Any]) -> dict[str, Any]:
+        """Store the grid fields of a ``/points`` response; it is written out by the next :meth:`persist`."""
+        grid = {key: properties[key] for key in GRID_FIELDS if key in properties}
+        grid["cached_at"] = self._clock()
+        key = self._key(latitude, longitude)
+        self._grids[key] = grid
+        self._grids.move_to_end(key)
+        while len(self._grids) > self.maxsize:
+            self._grids.popitem(last=False)
+        self._dirty = True
+        return grid
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": len(self._grids),
+            "hits": self.hits,
+            "misses": self.misses,
+            "persisted": bool(self.path),
+            "write_errors": self.write_errors,
+        }
+
+
+def freshness_lifetime(headers: httpx.Headers, now: float) -> float | None:
+    """Seconds the response may be served without revalidation.
+
+    ``None`` means the response must not be stored (``no-store``). ``0`` means
+    it may be stored but has to be revalidated before every use.
+    """
+    cache_control = headers.get("cache-control", "").lower()
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0.0
+    lifetimes = {name.lower(): int(value) for name, value in _MAX_AGE.findall(cache_control)}
+    if lifetimes:
+        lifetime = float(lifetimes.get("s-maxage", lifetimes.get("max-age")))
+        return max(0.0, lifetime - float(headers.get("age", 0) or 0))
+    expires = headers.get("expires")
+    if expires:
+        try:
+            date = headers.get("date")
+            origin = parsedate_to_datetime(date).timestamp() if date else now
+            return max(0.0, parsedate_to_datetime(expires).timestamp() - origin)
+        except (TypeError, ValueError):
+            return 0.0
+    return 0.0
+
+
+@dataclass
+class CachedResponse:
+    data: Any
+    fresh_until: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+class ConditionalCache:
+    """JSON response cache that honors HTTP freshness and revalidates stale entries.
+
+    Stale entries stay around for ``retain`` seconds, so they can still be
+    revalidated with a conditional request instead of being fetched again,
+    and served as a fallback while the upstream is failing.
+    """
+
+    def __init__(self, maxsize: int = 512, retain: float = 86400.0, clock: Callable[[], float] = time.time):
+        self._entries = TTLCache(maxsize=maxsize, ttl=retain, clock=clock)
+        self._clock = clock
+        self.fresh_hits = 0
+        self.revalidated = 0
+        self.fetched = 0
+        self.stale = 0
+
+    @classmethod
+    def from_env(cls) -> "ConditionalCache":
+        return cls(
+            maxsize=int(os.environ.get("NWS_CACHE_SIZE", 512)),
+            retain=float(os.environ.get("NWS_CACHE_RETAIN", 86400.0)),
+        )
+
+    async def get_json(
+        self,
+        url: str,
+        send: Callable[..., Awaitable[httpx.Response]],
+        headers: dict[str, str] | None = None,
+    ) -> Any:
+        """Return the JSON body for ``url``, using ``send(url, headers=...)`` only when needed.
+
+        HTTP errors are raised as ``httpx.HTTPStatusError``, the same as an uncached call,
+        unless a stale entry can be served instead.
+        """
+        entry: CachedResponse | None = self._entries.get(url)
+        now = self._clock()
+        if entry is not None and entry.fresh_until > now:
+            self.fresh_hits += 1
+            return entry.data
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry.etag:
+                request_headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                request_headers["If-Modified-Since"] = entry.last_modified
+
+        try:
+            response = await send(url, headers=request_headers)
+        except Exception:
+            if entry is None:
+                raise
+            self.stale += 1
+            return entry.data
+        if response.status_code >= 500 and entry is not None:
+            self.stale += 1
+            return entry.data
+        now = self._clock()
+        lifetime = freshness_lifetime(response.headers, now)
+        if response.status_code == 304 and entry is not None:
+            self.revalidated += 1
+            entry.fresh_until = now + (lifetime or 0.0)
+            entry.etag = response.headers.get("etag", entry.etag)
+            entry.last_modified = response.headers.get("last-modified", entry.last_modified)
+            self._entries.set(url, entry)
+            return entry.data
+
+        response.raise_for_status()
+        self.fetched += 1
+        data = response.json()
+        if lifetime is None:
+            self._entries.pop(url)
+        else:
+            self._entries.set(url, CachedResponse(
+                data=data,
+                fresh_until=now + lifetime,
+                etag=response.headers.get("etag"),
+                last_modified=response.headers.get("last-modified"),
+            ))
+        return data
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            # Served from the cache, with or without a revalidation round trip
+            "hits": self.fresh_hits + self.revalidated,
+            "misses": self.fetched,
+            "fresh_hits": self.fresh_hits,
+            "revalidated": self.revalidated,
+            "fetched": self.fetched,
+            "stale": self.stale,
+        }